@@ -0,0 +1,347 @@
+
+# Benchmarks for the conversion and download hot paths
+# Every input is generated locally and every case runs in a fresh process so peak memory is measured per case
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import resource
+import tempfile
+import threading
+import subprocess
+import contextlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from functools import partial
+
+from PIL import Image
+
+import main
+
+image_sizes = [(640, 480), (1920, 1080), (4000, 3000)]
+image_modes = ["RGBA", "LA", "P"]
+
+video_lengths = {"short": 2, "long": 20} # Seconds
+
+video_codecs = { # The (video, audio) codecs the synthetic source videos are encoded with for each container
+    ".mp4": ("libx264", "aac"),
+    ".mov": ("libx264", "aac"),
+    ".mkv": ("libx264", "aac"),
+    ".avi": ("mpeg4", "libmp3lame"),
+    ".wmv": ("wmv2", "wmav2"),
+}
+
+def get_types(kind): # The extensions of one kind from FileConverter.supported_files, without the *
+    index = 1 if kind == "image" else 2
+    return [file_type[1:] for file_type in main.FileConverter.supported_files[index][1].split()]
+
+def get_pairs(kind): # Every (source, target) conversion the app offers, jpg and jpeg count as the same type
+    types = get_types(kind)
+    return [(source, target) for source in types for target in types
+            if source != target and {source, target} != {".jpg", ".jpeg"}]
+
+def savable_mode(mode, extension): # The closest mode each format can actually store
+
+    if extension in (".jpg", ".jpeg"):
+        return "L" if mode == "LA" else "RGB"
+    if extension == ".gif":
+        return "P"
+    if extension == ".bmp" and mode == "LA":
+        return "L"
+    return mode
+
+def make_image(path, size, mode): # A gradient with noise on top so the encoders have real work to do
+
+    gradient = Image.linear_gradient("L").resize(size)
+    noise = Image.effect_noise(size, 40)
+    img = Image.merge("RGB", (gradient, noise, gradient.transpose(Image.FLIP_LEFT_RIGHT)))
+
+    if mode == "RGBA":
+        img.putalpha(gradient)
+    elif mode == "LA":
+        img = img.convert("L")
+        img.putalpha(gradient)
+    elif mode == "P":
+        img = img.convert("P", palette=Image.ADAPTIVE)
+
+    stored_mode = savable_mode(mode, os.path.splitext(path)[1])
+
+    if img.mode != stored_mode:
+        img = img.convert(stored_mode)
+
+    img.save(path)
+
+def make_video(path, seconds): # A test pattern with a tone, encoded with codecs that fit the container
+
+    video_codec, audio_codec = video_codecs[os.path.splitext(path)[1]]
+
+    subprocess.run(
+        [main.get_ffmpeg(), "-y", "-v", "error",
+         "-f", "lavfi", "-i", f"testsrc2=duration={seconds}:size=1280x720:rate=30",
+         "-f", "lavfi", "-i", f"sine=duration={seconds}",
+         "-c:v", video_codec, "-c:a", audio_codec, "-shortest", path],
+        check=True
+    )
+
+def stub_page(base_url): # A page the generic yt_dlp extractor understands, with a title, a thumbnail and a video
+    return f"""<html><head><title>Benchmark video</title>
+<meta property="og:title" content="Benchmark video">
+<meta property="og:image" content="{base_url}/thumbnail.jpg">
+<meta property="og:video" content="{base_url}/video.mp4">
+</head><body></body></html>"""
+
+def start_stub_server(directory): # Serves the directory on a free local port from a background thread
+
+    handler = partial(QuietHandler, directory=directory)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+class QuietHandler(SimpleHTTPRequestHandler): # Stops every request from being logged
+
+    def log_message(self, format, *args):
+        pass
+
+def build_cases(work_dir, kinds, server_url, name_filter=""): # Generates the inputs of the cases that match the filter and returns the cases
+
+    cases = []
+
+    if "images" in kinds:
+        for size in image_sizes:
+            for mode in image_modes:
+                for source, target in get_pairs("image"):
+                    name = f"{mode}-{size[0]}x{size[1]}"
+                    case_name = f"image/{source[1:]}-{name}->{target[1:]}"
+
+                    if name_filter not in case_name:
+                        continue
+
+                    path = os.path.join(work_dir, "images", f"{name}-to-{target[1:]}{source}") # One source per target since the output is written next to it
+
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    make_image(path, size, mode)
+
+                    cases.append({'name': case_name, 'kind': "image", 'path': path, 'target': "*" + target})
+
+    if "videos" in kinds:
+        for length, seconds in video_lengths.items():
+            for source, target in get_pairs("video"):
+                case_name = f"video/{source[1:]}-{length}->{target[1:]}"
+
+                if name_filter not in case_name:
+                    continue
+
+                path = os.path.join(work_dir, "videos", f"{length}-to-{target[1:]}{source}")
+
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                make_video(path, seconds)
+
+                cases.append({'name': case_name, 'kind': "video", 'path': path, 'target': "*" + target})
+
+    if "youtube" in kinds:
+        for operation in ("metadata-cold", "metadata-warm", "thumbnail-cold", "thumbnail-warm", "download"):
+            if name_filter in f"youtube/{operation}":
+                cases.append({'name': f"youtube/{operation}", 'kind': "youtube", 'operation': operation, 'url': server_url})
+
+    return cases
+
+def run_youtube_case(case, scratch_dir): # Does the untimed setup and returns the operation that gets timed
+
+    downloader = main.YoutubeDownloader(cache=main.InfoCache(), thumbnails=main.ThumbnailCache(os.path.join(scratch_dir, "thumbnails")))
+    page_url = case['url'] + "/page.html"
+    thumbnail_url = case['url'] + "/thumbnail.jpg"
+
+    if case['operation'] == "metadata-cold":
+        return lambda: downloader.get_info(page_url)
+
+    if case['operation'] == "metadata-warm":
+        downloader.get_info(page_url)
+        return lambda: downloader.get_info(page_url)
+
+    if case['operation'] == "thumbnail-cold":
+        return lambda: downloader.download_thumbnail(thumbnail_url, (320, 180))
+
+    if case['operation'] == "thumbnail-warm":
+        downloader.download_thumbnail(thumbnail_url, (320, 180))
+        return lambda: downloader.download_thumbnail(thumbnail_url, (320, 180))
+
+    return lambda: downloader.fetch_vid(page_url, scratch_dir, "video")
+
+def reset_peak_rss(): # Lets the peak memory of the case be measured without the setup before it (Linux only)
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+def read_peak_rss_kb():
+    # VmHWM starts over in every new process, unlike ru_maxrss which keeps the parent's peak across the exec of a spawned process
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def run_case(case): # Runs inside a fresh process, returns the measurements
+
+    result = {'wall_seconds': None, 'cpu_seconds': None, 'peak_rss_kb': None, 'output_bytes': None, 'error': None}
+    scratch_dir = tempfile.mkdtemp()
+
+    try:
+        with contextlib.redirect_stdout(open(os.devnull, "w")): # The converters print their progress
+            main.warm_imports() # Import time would otherwise land in whichever case runs first
+            converter = main.FileConverter()
+
+            if case['kind'] == "image":
+                operation = lambda: converter.convert_image(case['path'], case['target'])
+            elif case['kind'] == "video":
+                operation = lambda: converter.save_video_as(case['path'], case['target']) # What convert_video runs, but raising its errors
+            else:
+                operation = run_youtube_case(case, scratch_dir)
+
+            reset_peak_rss()
+            self_before = resource.getrusage(resource.RUSAGE_SELF)
+            children_before = resource.getrusage(resource.RUSAGE_CHILDREN) # ffmpeg runs as a child process
+            start_time = time.perf_counter()
+
+            output = operation()
+
+            result['wall_seconds'] = time.perf_counter() - start_time
+            self_after = resource.getrusage(resource.RUSAGE_SELF)
+            children_after = resource.getrusage(resource.RUSAGE_CHILDREN)
+
+        result['cpu_seconds'] = sum(after.ru_utime - before.ru_utime + after.ru_stime - before.ru_stime
+                                    for before, after in ((self_before, self_after), (children_before, children_after)))
+        result['peak_rss_kb'] = max(read_peak_rss_kb(), children_after.ru_maxrss) # Kilobytes
+
+        if output is None: # convert_image prints its errors and returns None
+            result['error'] = "conversion failed"
+        elif case['kind'] == "image":
+            result['output_bytes'] = os.path.getsize(output)
+        elif case['kind'] == "video":
+            output_file, result['method'] = output # Remux or transcode, so a change in which path is taken shows up
+            result['output_bytes'] = os.path.getsize(output_file)
+        elif isinstance(output, str) and os.path.isfile(output):
+            result['output_bytes'] = os.path.getsize(output)
+
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+
+    finally:
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+
+    return result
+
+def run_cases(cases, repeat): # Runs every case in its own process and keeps the fastest of the repeats
+
+    results = {}
+    context = multiprocessing.get_context("spawn") # Nothing is inherited from this process, so the peak memory belongs to the case
+
+    for case in cases:
+        best = None
+
+        for _ in range(repeat):
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                result = executor.submit(run_case, case).result()
+
+            if best is None or (result['error'] is None and (best['error'] is not None or result['wall_seconds'] < best['wall_seconds'])):
+                best = result
+
+        results[case['name']] = best
+
+        if best['error']:
+            print(f"{case['name']:<45} error: {best['error']}")
+        else:
+            print(f"{case['name']:<45} {best['wall_seconds'] * 1000:9.1f} ms wall {best['cpu_seconds'] * 1000:9.1f} ms cpu "
+                  f"{best['peak_rss_kb'] / 1024:7.1f} MB rss")
+
+    return results
+
+def compare(results, baseline, threshold): # Prints every case that got slower or bigger than the baseline allows, returns how many did
+
+    regressions = 0
+
+    for name, result in results.items():
+        old = baseline.get('results', {}).get(name)
+
+        if old is None or old['error'] or result['error']:
+            continue
+
+        for key in ("wall_seconds", "cpu_seconds", "peak_rss_kb"):
+            if old[key] and result[key] / old[key] > threshold:
+                print(f"REGRESSION {name}: {key} {old[key]:.4g} -> {result[key]:.4g} ({result[key] / old[key]:.2f}x)")
+                regressions += 1
+
+    return regressions
+
+def main_benchmark(argv=None):
+
+    parser = argparse.ArgumentParser(description="Benchmarks the NT file tools conversion and download paths")
+    parser.add_argument("--only", nargs="+", choices=["images", "videos", "youtube"], default=["images", "videos", "youtube"])
+    parser.add_argument("--filter", default="", help="only run the cases whose name contains this text")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per case, the fastest one is kept")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", help="results from an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=1.2, help="ratio to the baseline that counts as a regression")
+    args = parser.parse_args(argv)
+
+    work_dir = tempfile.mkdtemp(prefix="nt_benchmark_")
+
+    try:
+        # The stub server stands in for the video site, with a page, a thumbnail and a short video
+        server_dir = os.path.join(work_dir, "server")
+        os.makedirs(server_dir)
+        server, server_url = start_stub_server(server_dir)
+
+        if "youtube" in args.only:
+            make_image(os.path.join(server_dir, "thumbnail.jpg"), (1280, 720), "RGBA")
+            make_video(os.path.join(server_dir, "video.mp4"), video_lengths["short"])
+
+            with open(os.path.join(server_dir, "page.html"), "w") as f:
+                f.write(stub_page(server_url))
+
+        print("Generating inputs...")
+        cases = build_cases(work_dir, args.only, server_url, args.filter)
+
+        results = run_cases(cases, args.repeat)
+        server.shutdown()
+
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'time': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        'results': results,
+    }
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"Results saved to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+
+        print(f"{regressions} regression(s) against {args.baseline}")
+        return 1 if regressions else 0
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main_benchmark())
@@ -1,476 +1,3594 @@
 
-import tkinter as tk
-from tkinter import filedialog, simpledialog
-
-import os
 import time
+startup_time = time.perf_counter() # Used by --startup-time to measure how long the first window takes
 
-# For file conversion
-from moviepy.editor import VideoFileClip
+try:
+    import tkinter as tk
+    from tkinter import filedialog, simpledialog
+    from PIL import ImageTk # Needs tkinter too
+except ImportError: # Servers without Tk can still use the command line
+    tk = None
 
-from PIL import Image, ImageTk  # Import Image and ImageTk from PIL library
+import os
+import sys
+import argparse
+import csv
+import contextlib
+import cProfile
+import glob
+import fnmatch
+import re
+import signal
+import select
+import mmap
+import queue
+import threading
+import multiprocessing
+import subprocess
+import tempfile
+import shutil
+import hashlib
+import zlib
+import struct
+import json
+from collections import OrderedDict
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, as_completed, FIRST_COMPLETED
+
+from PIL import Image, ImageChops, ImageSequence  # Import Image from PIL library
 from io import BytesIO
-import requests
 
 #from tkhtmlview import HTMLLabel
-import yt_dlp as youtube_dl
 
-class FileConverter: # Handles file converting
+# moviepy, yt_dlp and requests are slow to import so they are only imported where they are first used,
+# the app warms them up in the background once the first window is showing
+heavy_modules = ["moviepy.editor", "yt_dlp", "requests"]
 
-    supported_files = [ # This includes the types of files that the programm can convert          
-        ("All Supported Files", "*.png *.jpg *.jpeg *.gif *.bmp *.mp4 *.avi *.mov *.wmv *.mkv"), # All supported image and video formats
-        ("Image Files", "*.png *.jpg *.jpeg *.gif *.bmp"), # Image formats
-        ("Video Files", "*.mp4 *.avi *.mov *.wmv *.mkv"), # Video formats
-    ]
+def warm_imports(): # Imports the heavy modules ahead of time so the first conversion or download doesnt wait on them
 
-    def convert_image(self, file_path, new_type, app):
-        # Ensure new_type does not include a leading dot and is in uppercase
-        desired_type = new_type.split(".")[1].upper()
+    for module in heavy_modules:
+        try:
+            __import__(module)
+        except ImportError as e:
+            print(f"Could not import {module}: {e}")
 
-        # Get the directory of the original file
-        directory_os = os.path.dirname(file_path)
-        
-        # Create a new file path with the desired type
-        base_name = os.path.splitext(os.path.basename(file_path))[0]
-        new_file_path = os.path.join(directory_os, f"{base_name}.{desired_type.lower()}")
+class Metrics: # Collects how long every stage takes plus byte and failure counters, safe to use from any thread
+
+    def __init__(self):
+
+        self.lock = threading.Lock()
+        self.stages = {} # stage -> [count, total seconds, slowest seconds]
+        self.counters = {} # (name, sorted labels) -> value
+
+        self.events_path = None # When set every span is also appended to this file as a json line
+        self.profile_dir = None # When set every job is run under cProfile and its stats are saved here
+
+    @contextlib.contextmanager
+    def span(self, stage, **labels): # Times the code inside the with block, exceptions are counted as failures of the stage
+
+        start_time = time.perf_counter()
 
         try:
-            # Open the image
-            with Image.open(file_path) as img:
-                if desired_type == 'JPEG' and img.mode in ('RGBA', 'LA'): # removing alpha transparency for jpegs
-                    img = img.convert('RGB')
-                
-                print(f"Saving image as {desired_type} to {new_file_path}")
-                img.save(new_file_path, format=desired_type)
-                app.welcome_window()
+            yield
+        except BaseException as e:
+            self.failure(stage, e)
+            raise
+        finally:
+            self.record(stage, time.perf_counter() - start_time, labels)
 
-            print(f"Image converted and saved as {new_file_path}")
+    def record(self, stage, seconds, labels=None):
 
-        except FileNotFoundError:
-            print(f"Error: The file {file_path} was not found.")
-        
-        except IOError as e:
-            print(f"IOError: {e}. Cannot convert or save the image.")
-        
-        except Exception as e:
-            print(f"An unexpected error occurred: {e}")
+        with self.lock:
+            stats = self.stages.setdefault(stage, [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2] = max(stats[2], seconds)
+
+            if self.events_path is not None:
+                with open(self.events_path, "a") as f:
+                    f.write(json.dumps({'time': time.time(), 'stage': stage, 'seconds': seconds, **(labels or {})}) + "\n")
+
+    def failure(self, stage, error): # Counts a failure, also used where a job ends with an error that no span saw
+        self.count("failures_total", stage=stage, type=type(error).__name__)
+
+    def count(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def snapshot(self): # A plain copy that can be sent back from a worker process and merged
+        with self.lock:
+            return {'stages': {stage: list(stats) for stage, stats in self.stages.items()},
+                    'counters': [[name, list(labels), value] for (name, labels), value in self.counters.items()]}
+
+    def merge(self, snapshot):
+
+        for stage, (count, total, slowest) in snapshot['stages'].items():
+            with self.lock:
+                stats = self.stages.setdefault(stage, [0, 0.0, 0.0])
+                stats[0] += count
+                stats[1] += total
+                stats[2] = max(stats[2], slowest)
+
+        for name, labels, value in snapshot['counters']:
+            self.count(name, value, **dict(labels))
+
+    def to_prometheus(self): # The Prometheus text format, ready for a node exporter textfile or a push gateway
+
+        snapshot = self.snapshot()
+        lines = ["# TYPE nt_stage_seconds summary"]
+
+        for stage, (count, total, slowest) in sorted(snapshot['stages'].items()):
+            lines.append(f'nt_stage_seconds_count{{stage="{stage}"}} {count}')
+            lines.append(f'nt_stage_seconds_sum{{stage="{stage}"}} {total:.6f}')
+
+        lines.append("# TYPE nt_stage_seconds_max gauge")
+        for stage, (count, total, slowest) in sorted(snapshot['stages'].items()):
+            lines.append(f'nt_stage_seconds_max{{stage="{stage}"}} {slowest:.6f}')
+
+        typed = set()
+        for name, labels, value in sorted(snapshot['counters']):
+            if name not in typed:
+                lines.append(f"# TYPE nt_{name} counter")
+                typed.add(name)
+
+            label_text = ",".join(f'{key}="{escape_label(label)}"' for key, label in labels)
+            lines.append(f"nt_{name}{{{label_text}}} {value}")
+
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        with open(path, "w") as f:
+            f.write(self.to_prometheus())
+
+    @contextlib.contextmanager
+    def profile(self, name): # Runs the with block under cProfile when profile_dir is set, only the current thread is profiled
+
+        if self.profile_dir is None:
+            yield
+            return
+
+        profiler = cProfile.Profile()
+        profiler.enable()
 
-    def convert_video(self, file_path, new_type, app):
         try:
-            # Extract the file name without extension and the current extension
-            file_name, current_extension = os.path.splitext(file_path)
-            
-            # Ensure the new type starts with a dot (e.g., ".avi")
-            new_type = new_type.split("*")[1]
+            yield
+        finally:
+            profiler.disable()
+            os.makedirs(self.profile_dir, exist_ok=True)
+            safe_name = re.sub(r"[^\w.-]+", "_", name)[:80]
+            profiler.dump_stats(os.path.join(self.profile_dir, f"{safe_name}-{int(time.time() * 1000)}.prof"))
 
-            # Construct the output file path
-            output_file = file_name + new_type
+def escape_label(value): # Prometheus label values need their backslashes, quotes and newlines escaped
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
 
-            # Load the video file
-            video_clip = VideoFileClip(file_path)
+metrics = Metrics() # Shared by the whole app, worker processes send theirs back to be merged
 
-            # Write the video to the new file with specified format
-            video_clip.write_videofile(output_file, codec='libx264', audio_codec='aac')
+def get_image_type(new_type): # Turns "*.png", ".png" or "png" into the type PIL expects ("PNG")
+    return new_type.split(".")[-1].upper()
 
-            print(f"Video successfully converted and saved as {output_file}")
-            app.welcome_window() # Returning to homepage
-        
-        except Exception as e:
-            print(f"An error occurred: {e}")
+def get_pil_format(new_type): # Same as get_image_type but with the name PIL saves it under, PIL only knows jpgs as JPEG
+    image_type = get_image_type(new_type)
+    return 'JPEG' if image_type == 'JPG' else image_type
 
-class YoutubeDownloader: #Handles youtube downloading
+def has_type(file_path, new_type): # Checks if the file already is of the new type, jpg and jpeg count as the same type
+    aliases = {"jpeg": "jpg"}
+    extension = os.path.splitext(file_path)[1].lower().lstrip(".")
+    new_type = new_type.split(".")[-1].lower()
+    return aliases.get(extension, extension) == aliases.get(new_type, new_type)
 
-    def get_vid(self, link):
-    
-        ydl_opts = {
-            'quiet': True,  # Suppress output messages
-            'noplaylist': True,  # Don't download playlists
-            'skip_download': True,  # Only extract info, don't download
-        }
-            
-        with youtube_dl.YoutubeDL(ydl_opts) as ydl:
-            try:
-                info_dict = ydl.extract_info(link, download=False)
-                return info_dict['title'], info_dict['thumbnail']
-            except Exception as e:
-                print(f"Error downloading video: {e}")
-    
-    def download_thumbnail(self, thumbnail_url): # Downloads the vid thumbnail so that it can be displayed to the user
-        response = requests.get(thumbnail_url)
-        image_data = BytesIO(response.content)
+strip_formats = ("PNG", "BMP") # Formats that can be written a strip at a time in low memory mode
+animated_formats = ("GIF", "PNG") # Formats that can hold every frame of an animation (pngs as APNG)
 
-        return Image.open(image_data)
+def mode_for_format(mode, pil_format): # The mode an image has to be converted to before it can be saved in the format
 
-    def download_vid(self, link):
+    supported_modes = {
+        'JPEG': ('L', 'RGB', 'CMYK'),
+        'BMP': ('1', 'L', 'P', 'RGB', 'RGBA'),
+        'PNG': ('1', 'L', 'LA', 'P', 'RGB', 'RGBA', 'I', 'I;16'),
+    }
 
-        download_dir = filedialog.askdirectory(title="Select Download Directory")
+    if pil_format not in supported_modes or mode in supported_modes[pil_format]:
+        return mode
 
-        if not download_dir:
-            return False
-        
-        default_filename = 'video'
-        filename = simpledialog.askstring("Input", "Enter filename (without extension):", initialvalue=default_filename)
+    if pil_format != 'JPEG' and ('A' in mode or mode == 'P'): # removing alpha transparency is only needed for jpegs
+        return 'RGBA'
 
-        if filename is None:
-            filename = default_filename
-        
-        filename = filename.replace('/', '_').replace('\\', '_')  # Ensures it doesnt contain invalid characters
+    return 'RGB'
 
-        ydl_opts = {
-            'format': 'best',  # Download the best quality
-            'outtmpl': os.path.join(download_dir, f'{filename}.%(ext)s'),  
-            'noplaylist': True,  # Don't download playlists
-        }
-        
-        with youtube_dl.YoutubeDL(ydl_opts) as ydl:
-            try:
-                ydl.download([link])
+def save_image_as(file_path, desired_type, metrics=metrics, memory_limit=None, frames="auto"):
+    # Converts a single image and returns the path of the new file
+    # memory_limit (bytes) switches big images to strip by strip conversion, frames says what happens to animations:
+    # "animate" keeps them animated, "split" saves every frame as its own file, "first" only keeps the first frame and "auto" picks by format
 
-                downloaded_file = os.path.join(download_dir, f'{filename}.{ydl.prepare_filename(ydl.extract_info(link, download=False)).split(".")[-1]}')
-                
-                current_time = time.time()
-                os.utime(downloaded_file, (current_time, current_time)) # Fixes a bug where the file creation time was incorrect
+    # Get the directory of the original file
+    directory_os = os.path.dirname(file_path)
 
-                return True
-            except Exception as e:
-                print(f"Error downloading video: {e}")
+    # Create a new file path with the desired type
+    base_name = os.path.splitext(os.path.basename(file_path))[0]
+    new_file_path = os.path.join(directory_os, f"{base_name}.{desired_type.lower()}")
 
-class App:
+    pil_format = get_pil_format(desired_type)
 
-    def __init__(self):
+    if os.path.abspath(new_file_path) == os.path.abspath(file_path): # Saving over the source would only lose quality (and strips read from it)
+        raise ValueError(f"{file_path} already is a {desired_type} file")
 
-        self.root = None
+    # Open the image, a file PIL cant read fails here
+    with metrics.span("image_open"):
+        img = Image.open(file_path)
 
-        self.welc_window = None
-        self.conv_window = None
-        self.yt_window = None
+    with img:
+        frame_count = getattr(img, "n_frames", 1)
 
-        self.welcome_window() # Creates the welcome window when the app is first opened
-    
-    def welcome_window(self):  
+        if frame_count > 1 and frames == "first":
+            print(f"Warning: {file_path} has {frame_count} frames, only the first one is converted")
+        elif frame_count > 1:
+            new_file_path = save_frames(img, new_file_path, pil_format, frames, metrics)
+            frame_count = 0 # Already saved
+        elif memory_limit is not None and estimate_image_bytes(img.size, img.mode) * 2 > memory_limit:
+            # The normal path holds the decoded image plus a converted or encoded copy, so big images go strip by strip
+            with metrics.span("image_strip_convert", format=pil_format):
+                save_in_strips(img, new_file_path, pil_format, memory_limit)
+            frame_count = 0
 
-        if self.welc_window is None: # Checking if the window class already exists
-            self.welc_window = WelcomeWindow() # Creating the welcome window
+        if frame_count:
+            img = prepare_image(img, pil_format, metrics)
 
-        self.welc_window.load_ui(self.root, self)
+            # Encoding into memory first so the encode and the write are timed on their own
+            encoded = BytesIO()
+            with metrics.span("image_encode", format=pil_format):
+                img.save(encoded, format=pil_format)
 
-    def convertion_window(self):
+            with metrics.span("image_write"):
+                with open(new_file_path, "wb") as f:
+                    f.write(encoded.getbuffer())
 
-        if self.conv_window is None: # Checking if the window class already exists
-            self.conv_window = ConversionWindow() # Creating the welcome window
+    metrics.count("bytes_in_total", os.path.getsize(file_path), kind="image")
+    metrics.count("bytes_out_total", os.path.getsize(new_file_path), kind="image")
 
-        self.conv_window.load_ui(self.root, self)
+    return new_file_path
 
-    def youtube_window(self):   
+def prepare_image(img, pil_format, metrics=metrics): # Decodes the image and converts it to a mode the new format can store
 
-        if self.yt_window is None: # Checking if the window class already exists
-            self.yt_window = YoutubeWindow() # Creating the youtube window
+    with metrics.span("image_decode", format=img.format):
+        img.load()
 
-        self.yt_window.load_ui(self.root, self)
+    new_mode = mode_for_format(img.mode, pil_format)
 
-    def get_img(self, name, sizeDimensions): # Returns the image object at its usable form
+    if new_mode != img.mode: # removing alpha transparency for jpegs and modes the new format cant store
+        with metrics.span("image_mode_conversion", mode=img.mode):
+            img = img.convert(new_mode)
 
-        image_path = os.path.join(os.path.join(os.path.dirname(__file__), "assets"), name)  
-        img = Image.open(image_path)
-        img = img.resize(sizeDimensions, Image.LANCZOS)  # Resize image to fit window
-        background_image = ImageTk.PhotoImage(img)
+    return img
 
-        return background_image
-    
-    def set_root(self, target_class): # Sets the root to the one of the desired class
-        self.root = target_class.root 
+class OutputWriter: # Lets encoders write to a caller's stream, bytearray (appended to) or memoryview / mmap (fixed size) and counts the bytes
 
-class WelcomeWindow:
+    def __init__(self, target):
+        self.target = target
+        self.written = 0
+        self.position = len(target) if isinstance(target, bytearray) else 0
 
-    def load_ui(self, root, app):
+    def write(self, data):
 
-        if root is not None:
-            root.destroy() # Destroying the previous window if it existed
+        size = len(data)
 
-        self.root = tk.Tk()
-        self.app = app
+        if hasattr(self.target, "write"): # Streams, and mmaps which raise themselves when they are too small
+            self.target.write(data)
+        elif isinstance(self.target, bytearray):
+            self.target += data
+        else:
+            if self.position + size > len(self.target):
+                raise ValueError(f"The output buffer is too small, at least {self.position + size} bytes are needed")
 
-        self.app.set_root(self) # Sets the root of the app to the one of this window
+            self.target[self.position:self.position + size] = data
+            self.position += size
 
-        # Core window settings
-        self.root.geometry("800x600")
-        self.root.title("NT file tools")
-        self.root.config(bg="black")
-        self.root.resizable(False, False) # Makes the window not resizable
+        self.written += size
+        return size
 
-        # These 4 lines turn the background into an image
-        bg_img = app.get_img("background.jpg", (800,600)) 
-        background_label = tk.Label(self.root, image=bg_img)
-        background_label.img = bg_img
-        background_label.place(x=0, y=0, relwidth=1, relheight=1)
+    def flush(self):
+        if hasattr(self.target, "flush"):
+            self.target.flush()
 
-        main_frame = tk.Frame(self.root, bg="#0d0d0d") # Everything resides in this frame in order to be centred
-        main_frame.pack(expand=True)
+def open_output(output): # Something with write() for the output, None means new bytes are returned
+    return BytesIO() if output is None else OutputWriter(output)
 
-        title = tk.Label(main_frame, text="Welcome to NT file tools!", font=('Arial', 25), bg="#0d0d0d", fg="white")
-        title.pack()
+def finish_output(output, writer): # What the data functions return: the new bytes when no output was given, otherwise the number of bytes written
+    return writer.getvalue() if output is None else writer.written
 
-        options_label = tk.Label(main_frame, text="Please choose one of the following functions.", font=('Arial', 18), bg="#0d0d0d", fg="white")
-        options_label.pack(pady=30)
+def save_image_data(source, desired_type, output=None, metrics=metrics, frames="auto"):
+    # Converts an image held in memory (bytes, bytearray, memoryview, mmap or a file object) without touching the disk
+    # Returns the new image as bytes, or writes it to output (a stream, a bytearray or a big enough memoryview / mmap) and returns its size
+    # Animations are kept when the format can hold them, otherwise only the first frame is converted ("split" cant work with one output)
 
-        buttons_frame = tk.Frame(main_frame, bg="#0d0d0d")
-        buttons_frame.pack(pady=10)
+    pil_format = get_pil_format(desired_type) # Takes "jpg", ".png" or "*.PNG" like FileConverter does
 
-        converter_button = tk.Button(buttons_frame, text="Converter", font=('Arial', 18), bg="#0b21e3", fg="white", command=app.convertion_window)
-        converter_button.pack(side=tk.LEFT, padx=10)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        bytes_in = memoryview(source).nbytes
+        source = BytesIO(source) # For bytes this shares the memory instead of copying it
+    else:
+        bytes_in = None # Only known for buffers
 
-        yt_button = tk.Button(buttons_frame, text="Youtube", font=('Arial', 18), bg="#e30b0b", fg="white", command=app.youtube_window)
-        yt_button.pack(side=tk.LEFT, padx=10)
+    writer = open_output(output)
 
-        self.root.mainloop()
+    with metrics.span("image_open"):
+        img = Image.open(source)
 
-class ConversionWindow:
+    with img:
+        frame_count = getattr(img, "n_frames", 1)
 
-    def __init__(self):
-        self.file_converter = FileConverter() # Setting up the file converter class
+        if frames == "split":
+            raise ValueError("frames='split' needs a file per frame, use save_image_as instead")
 
-    def load_ui(self, root, app): # The ui that opens when the window is first loaded
+        if frame_count > 1 and frames != "first" and pil_format in animated_formats:
+            with metrics.span("image_encode", format=pil_format, frames=frame_count):
+                img.save(writer, format=pil_format, save_all=True)
+        else:
+            if frame_count > 1 and frames != "first":
+                print(f"Warning: {pil_format} cant hold an animation, only the first of {frame_count} frames is converted")
 
-        root.destroy() # Destroying the previous window if it existed
+            img = prepare_image(img, pil_format, metrics)
 
-        self.root = tk.Tk()
-        self.app = app
-        self.app.set_root(self) # Sets the root of the app to the one of this window
+            # Encoded straight into the output, no copy in between
+            with metrics.span("image_encode", format=pil_format):
+                img.save(writer, format=pil_format)
 
-        # Core window settings
-        self.root.geometry("800x600")
-        self.root.title("NT youtube downloader")
-        self.root.config(bg="black")
-        self.root.resizable(False, False) # Makes the window not resizable
+    result = finish_output(output, writer)
 
-        # These 4 lines turn the background into an image
-        bg_img = app.get_img("background.jpg", (800,600)) 
-        background_label = tk.Label(self.root, image=bg_img)
-        background_label.img = bg_img
-        background_label.place(x=0, y=0, relwidth=1, relheight=1)
+    if bytes_in is not None:
+        metrics.count("bytes_in_total", bytes_in, kind="image")
+    metrics.count("bytes_out_total", len(result) if output is None else result, kind="image")
 
-        main_frame = tk.Frame(self.root, bg="#292929")
-        main_frame.pack(expand=True)
+    return result
 
-        self.title_label = tk.Label(main_frame, text="Please select a file to convert", font=('Arial', 22), bg="#292929", fg="white", wraplength=700)
-        self.title_label.pack(pady=10)
+def save_frames(img, new_file_path, pil_format, frames, metrics): # Converts every frame of an animation, one frame at a time
 
-        buttons_frame = tk.Frame(main_frame, bg="#292929")
-        buttons_frame.pack(pady=20)
+    if frames == "auto":
+        frames = "animate" if pil_format in animated_formats else "split"
 
-        self.selection_button = tk.Button(buttons_frame, text="Select", font=('Arial', 22), bg="#0b21e3", fg="white", command=self.select_file)
-        self.selection_button.pack(side=tk.LEFT, padx=10)
+    if frames == "animate":
+        if pil_format not in animated_formats:
+            raise ValueError(f"{pil_format} files cant hold an animation, use frames='split' instead")
 
-        self.decline_button = tk.Button(buttons_frame, text="Cancel", font=('Arial', 22), bg="#a3051a", fg="white", command=self.app.welcome_window)
-        self.decline_button.pack(side=tk.LEFT ,padx=10)
+        # PIL seeks through the source frames itself, the frame durations and loop count come along from the source
+        with metrics.span("image_encode", format=pil_format, frames=img.n_frames):
+            img.save(new_file_path, format=pil_format, save_all=True)
 
-        self.root.mainloop()
+        return new_file_path
 
-    def select_file(self): # Selects which file the user wants to convert
-        
-        file_path = filedialog.askopenfilename(
-            title="Please select a file to convert",  
-            filetypes=self.file_converter.supported_files
-        )
+    # Every frame becomes its own numbered file, only one frame is decoded at a time
+    base_path, extension = os.path.splitext(new_file_path)
+    frame_paths = []
 
-        if file_path: # Checking if the user selected a file
-            
-            file_name_with_extension = os.path.basename(file_path) # Gets the name of the file but with the extension too
-            file_name, file_extension = os.path.splitext(file_name_with_extension) # Seperates the extension from the name of the file
+    for index, frame in enumerate(ImageSequence.Iterator(img), start=1):
+        frame_path = f"{base_path}_{index:04d}{extension}"
 
-            self.title_label.config(text=f"Please select into which file type you want to convert {file_name_with_extension}.")
-            self.selection_button.config(text="Confirm", bg="#0a7806", command=lambda: self.select_type(file_path, file_name, file_extension))
-            self.decline_button.config(command=lambda: self.load_ui(self.root, self.app))
+        with metrics.span("image_encode", format=pil_format):
+            frame.convert(mode_for_format(frame.mode, pil_format)).save(frame_path, format=pil_format)
 
-    def select_type(self, file_path, file_name, file_extension): # Selects in what type the user wants to convert the file
-        
-        isImage = None # This will help us know what file type we have later on
-        title_text = None # This will be set to the text of the grid header later on
-        file_types = None # The list of the file types that will later be looped through
+        frame_paths.append(frame_path)
 
-        # Get the list of supported file types for images and videos
-        image_file_types = self.file_converter.supported_files[1][1].split()
-        video_file_types = self.file_converter.supported_files[2][1].split()
-        file_ext_trans = "*" + file_extension # Adding a * to the start of the extension so that it is the same type as the ones in the lists
+    print(f"Saved {len(frame_paths)} frames as {os.path.basename(frame_paths[0])} to {os.path.basename(frame_paths[-1])}")
 
-        if (file_ext_trans) in image_file_types: # Checking if the file type is an image
+    return frame_paths[0]
 
-            file_types = image_file_types
-            file_types.remove(file_ext_trans)
+def estimate_image_bytes(size, mode): # Roughly how much memory the decoded image takes, PIL keeps every multi band pixel in 4 bytes
+    return size[0] * size[1] * (1 if mode in ("1", "L", "P") else 4)
 
-            if file_ext_trans != "*.jpg": # checking if it hasnt already been removed
-                file_types.remove("*.jpg") # Removing jpg as jpeg already exists
-            else:
-                file_types.remove("*.jpeg") # Removing jpeg since file is a jpg
+def is_raw_image(img): # Uncompressed images (like most bmps) can be read a few rows at a time straight from the file
 
-            isImage = True
-            title_text = "Image types"
-        elif (file_ext_trans) in video_file_types: # Checking if the file type is a video
+    if len(img.tile) != 1 or not getattr(img, "filename", None):
+        return False
 
-            file_types = video_file_types
-            file_types.remove(file_ext_trans)
-            isImage = False 
-            title_text = "Video types"
-        else: # The program has failed
+    codec, extents, offset, args = img.tile[0]
 
-            self.app.welcome_window() # Going back to the homepage
-            return None
+    return (codec == "raw" and tuple(extents) == (0, 0) + img.size and
+            isinstance(args, tuple) and len(args) == 3 and args[1] > 0)
 
-        self.root.destroy() # Destroying the previous window
-        self.root = tk.Tk()
-        self.app.set_root(self) # Sets the root of the app to the one of this window
+def get_palette(img): # The RGB palette of a paletted image without decoding it, bmps keep theirs raw until the image is loaded
 
-        # Core window settings
-        self.root.geometry("600x600")
-        self.root.title("NT youtube downloader")
-        self.root.config(bg="black")
-        self.root.resizable(False, False) # Makes the window not resizable
+    if img.palette.rawmode:
+        swatch = Image.new("P", (1, 1))
+        swatch.putpalette(img.palette.palette, img.palette.rawmode)
+        return bytes(swatch.getpalette())
 
-        # These 4 lines turn the background into an image
-        bg_img = self.app.get_img("background.jpg", (800,600)) 
-        background_label = tk.Label(self.root, image=bg_img)
-        background_label.img = bg_img
-        background_label.place(x=0, y=0, relwidth=1, relheight=1)
+    return img.palette.tobytes()
 
-        main_frame = tk.Frame(self.root, bg="#292929")
-        main_frame.pack(expand=True)
+def read_strips(img, rows_per_strip): # Yields (top row, strip) without ever decoding the whole image
 
-        header_label = tk.Label(main_frame, text=title_text, font=('Arial', 18, 'bold'), bg="#292929", fg="white")
-        header_label.grid(row=0, column=1, padx=10, pady=5, sticky="ew")
+    codec, extents, offset, (rawmode, stride, orientation) = img.tile[0]
+    width, height = img.size
+    palette = get_palette(img) if img.mode == "P" else None
 
-        for i,file_type in enumerate(file_types):
+    with open(img.filename, "rb") as f:
+        for top in range(0, height, rows_per_strip):
+            rows = min(rows_per_strip, height - top)
 
-            file_button = tk.Button(main_frame, text=file_type, font=('Arial', 18, 'bold'), bg="#4c4d4c", fg="white", command=lambda file_type=file_type:self.convert_ui(file_path, file_name, file_extension, file_type, isImage))
-            file_button.grid(row=(i + 1), column=1, padx=10, pady=5, sticky="ew")
+            first_row = height - top - rows if orientation < 0 else top # Bottom up files store the last row first
+            f.seek(offset + first_row * stride)
 
-    def convert_ui(self, file_path, file_name, file_type_old, file_type_new, IsImage): # The ui that has the user confirm what file he wants to convert and in which type
+            strip = Image.frombytes(img.mode, (width, rows), f.read(rows * stride), "raw", rawmode, stride, orientation)
 
-        self.root.destroy() # Destroying the previous window
-        self.root = tk.Tk()
-        self.app.set_root(self) # Sets the root of the app to the one of this window
+            if palette is not None:
+                strip.putpalette(palette)
 
-        convert_function = None
+            yield top, strip
 
-        # Deciding which convert method to use based on if the file is an image or not
-        if IsImage == True:
-            convert_function = self.file_converter.convert_image
-        else:
-            convert_function = self.file_converter.convert_video
+def crop_strips(img, rows_per_strip): # For compressed images PIL has to decode everything, but the conversion can still go strip by strip
 
-        # Core window settings
-        self.root.geometry("800x600")
-        self.root.title("NT youtube downloader")
-        self.root.config(bg="black")
-        self.root.resizable(False, False) # Makes the window not resizable
+    img.load()
 
-        # These 4 lines turn the background into an image
-        bg_img = self.app.get_img("background.jpg", (800,600)) 
-        background_label = tk.Label(self.root, image=bg_img)
-        background_label.img = bg_img
-        background_label.place(x=0, y=0, relwidth=1, relheight=1)
+    for top in range(0, img.size[1], rows_per_strip):
+        yield top, img.crop((0, top, img.size[0], min(img.size[1], top + rows_per_strip)))
 
-        main_frame = tk.Frame(self.root, bg="#292929")
-        main_frame.pack(expand=True)
+def save_in_strips(img, new_file_path, pil_format, memory_limit): # Converts the image a strip at a time and keeps below memory_limit
 
-        title_text = f'Are you sure you want to convert the {file_name+file_type_old} into a {file_type_new}?'
-        title_label = tk.Label(main_frame, text=title_text, font=('Arial', 22), bg="#4c4d4c", fg="white", wraplength=700)
-        title_label.pack(pady=10)
+    width, height = img.size
+    new_mode = mode_for_format(img.mode, pil_format)
 
-        buttons_frame = tk.Frame(main_frame, bg="#292929") # This frame will contain the Yes and No buttons
-        buttons_frame.pack(pady=20)
+    if img.mode == "P" and "transparency" in img.info: # Strips lose the transparency of paletted images, so it is turned into alpha
+        new_mode = "RGBA" if pil_format != "JPEG" else "RGB"
 
-        accept_button = tk.Button(buttons_frame, text="Yes", font=('Arial', 22), bg="#048526", fg="white", command=lambda: convert_function(file_path, file_type_new, self.app))
-        accept_button.pack(side=tk.LEFT, padx=10)
+    if pil_format in strip_formats and new_mode not in ("L", "P", "RGB", "RGBA", "LA"):
+        new_mode = "RGBA" if "A" in new_mode else "L" if new_mode == "1" else "RGB"
 
-        decline_button = tk.Button(buttons_frame, text="No", font=('Arial', 22), bg="#a3051a", fg="white", command=self.app.welcome_window)
-        decline_button.pack(side=tk.LEFT, padx=10)
+    if pil_format == "BMP" and new_mode == "LA": # bmps have no grayscale with alpha
+        new_mode = "RGBA"
 
-class YoutubeWindow:
+    raw_source = is_raw_image(img)
+    row_bytes = width * 4 # Every mode used here fits in 4 bytes per pixel
 
-    def __init__(self):
-        self.yt_dl = YoutubeDownloader() # Setting up the youtube downloader class
+    whole_images = 0
+    if not raw_source:
+        whole_images += estimate_image_bytes(img.size, img.mode) # Compressed sources are decoded in one go
+    if pil_format not in strip_formats:
+        whole_images += estimate_image_bytes(img.size, new_mode) # jpeg and gif encoders need the whole image
 
-    def load_ui(self, root, app):
-                 
-        root.destroy() # Destroying the previous window if it existed
+    # The strips get what the whole images leave over, a strip exists in a few copies at once while it is converted and written
+    rows_per_strip = max(1, min(height, (memory_limit - whole_images) // 8 // row_bytes))
 
-        self.root = tk.Tk()
-        self.app = app
-        self.app.set_root(self) # Sets the root of the app to the one of this window
+    # Checking up front that the plan fits, so a worker fails cleanly instead of being killed for running out of memory
+    needed = 4 * rows_per_strip * row_bytes + whole_images
 
-        # Core window settings
-        self.root.geometry("800x600")
-        self.root.title("NT youtube downloader")
-        self.root.config(bg="black")
-        self.root.resizable(False, False) # Makes the window not resizable
+    if needed > memory_limit:
+        raise MemoryError(f"Converting {img.filename} to {pil_format} needs about {needed / 2**20:.0f} MB, "
+                          f"more than the limit of {memory_limit / 2**20:.0f} MB")
 
-        # These 4 lines turn the background into an image
-        bg_img = app.get_img("background.jpg", (800,600)) 
-        background_label = tk.Label(self.root, image=bg_img)
-        background_label.img = bg_img
-        background_label.place(x=0, y=0, relwidth=1, relheight=1)
+    strips = read_strips(img, rows_per_strip) if raw_source else crop_strips(img, rows_per_strip)
 
-        self.main_frame = tk.Frame(self.root, bg='#0d0d0d') # Everything will be stored in here
-        self.main_frame.pack(expand=True, fill='x')
+    if pil_format not in strip_formats:
+        # The output is put together from converted strips so the source and a converted copy are never both whole
+        output = Image.new(new_mode, img.size)
 
-        self.title = tk.Label(self.main_frame, text="Please enter your link below", font=('Arial', 22), bg="#292929", fg="white")
-        self.title.pack()
+        for top, strip in strips:
+            output.paste(strip.convert(new_mode), (0, top))
 
-        video_img = app.get_img("vid_placeholder.jpg", (414, 232)) 
-        self.video_label = tk.Label(self.main_frame, width=320, height=180, image=video_img) # this will show the youtube video image placeholder
-        self.video_label.img = video_img
-        self.video_label.pack(pady=10)
+        output.save(new_file_path, format=pil_format)
+        return
 
-        self.video_entry = tk.Entry(self.main_frame, font=('Arial', 22), width=700, justify='center', bg="#171717", fg="white")
-        self.video_entry.pack(pady=10)
+    palette = get_palette(img) if new_mode == "P" else None
+    writer = PngStripWriter(new_file_path, img.size, new_mode, palette) if pil_format == "PNG" else BmpStripWriter(new_file_path, img.size, new_mode, palette)
 
-        self.buttons_frame = tk.Frame(self.main_frame, bg="#0d0d0d") # This frame will contain the confirm/download and cancel button
-        self.buttons_frame.pack(pady=10)
+    try:
+        for top, strip in strips:
+            writer.write(strip.convert(new_mode) if strip.mode != new_mode else strip, top)
+    finally:
+        writer.close()
 
-        self.confirm_button = tk.Button(self.buttons_frame, text="Confirm", font=('Arial', 22), bg="#026302", fg="white", command=self.onConfirm)
-        self.confirm_button.pack(side=tk.LEFT, padx=10)
+class PngStripWriter: # Writes a png a strip at a time, rows are Sub filtered with ImageChops so it stays fast
 
-        self.cancel_button = tk.Button(self.buttons_frame, text="Exit", font=('Arial', 22), bg="#c9040e", fg="white", command=app.welcome_window)
-        self.cancel_button.pack(side=tk.LEFT, padx=10) # Making the cancel button visible
+    color_types = {"L": 0, "RGB": 2, "P": 3, "LA": 4, "RGBA": 6}
 
-        self.root.mainloop()
+    def __init__(self, path, size, mode, palette=None):
 
-    def download(self, yt_dl, yt_link): # Runs when the user clicks the download button
+        self.mode = mode
+        self.file = open(path, "wb")
+        self.compressor = zlib.compressobj(6)
 
-        video = None 
+        self.file.write(b"\x89PNG\r\n\x1a\n")
+        self.write_chunk(b"IHDR", struct.pack(">IIBBBBB", size[0], size[1], 8, self.color_types[mode], 0, 0, 0))
 
-        self.root.withdraw() # Hiding the root until the user selects where the vid should be downloaded
-        video = yt_dl.download_vid(yt_link)
+        if mode == "P":
+            self.write_chunk(b"PLTE", palette[:768])
 
-        if video is True:
-            print("Download finished successfully.")
-            self.app.youtube_window() #resetting the window
+    def write_chunk(self, kind, data):
+        self.file.write(struct.pack(">I", len(data)) + kind)
+        self.file.write(data)
+        self.file.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(kind)) & 0xffffffff))
+
+    def write(self, strip, top):
+
+        if self.mode == "P": # Filtering palette indexes doesnt help, so the rows are stored as they are
+            filter_type = b"\x00"
         else:
-            print("Download failed.")
-            self.load_ui(self.root, self.app)  # Restart the app         
+            # Sub filter: every byte minus the same channel of the pixel to its left, which compresses much better
+            shifted = ImageChops.offset(strip, 1, 0)
+            shifted.paste(0, (0, 0, 1, strip.height))
+            strip = ImageChops.subtract_modulo(strip, shifted)
+            filter_type = b"\x01"
 
-    def onConfirm(self): # Runs when the user enters a link and presses confirm    
+        data = strip.tobytes()
+        stride = len(data) // strip.height
+        rows = b"".join(filter_type + data[row * stride:(row + 1) * stride] for row in range(strip.height))
 
-        yt_link = self.video_entry.get()
-        print(yt_link)
-        video_title, thumbnail_url = self.yt_dl.get_vid(yt_link) 
+        compressed = self.compressor.compress(rows)
+        if compressed:
+            self.write_chunk(b"IDAT", compressed)
 
-        if video_title is not None and thumbnail_url: #checks if the link is valid
-            
-            thumbnail = self.yt_dl.download_thumbnail(thumbnail_url)
+    def close(self):
+
+        if not self.file.closed:
+            self.write_chunk(b"IDAT", self.compressor.flush())
+            self.write_chunk(b"IEND", b"")
+            self.file.close()
+
+class BmpStripWriter: # Writes a bmp a strip at a time, bmps store their rows bottom up so each strip is written at its own place in the file
+
+    bit_counts = {"L": 8, "P": 8, "RGB": 24, "RGBA": 32}
+    rawmodes = {"L": "L", "P": "P", "RGB": "BGR", "RGBA": "BGRA"}
+
+    def __init__(self, path, size, mode, palette=None):
+
+        self.mode = mode
+        self.width, self.height = size
+        bits = self.bit_counts[mode]
+        self.stride = ((self.width * bits + 31) // 32) * 4 # Rows are padded to 4 bytes
+
+        color_table = b""
+        if mode == "L":
+            color_table = b"".join(bytes((i, i, i, 0)) for i in range(256))
+        elif mode == "P":
+            palette = palette.ljust(768, b"\x00")
+            color_table = b"".join(bytes((palette[i + 2], palette[i + 1], palette[i], 0)) for i in range(0, 768, 3)) # bmps store colors as BGR
+
+        self.data_offset = 14 + 40 + len(color_table)
+        file_size = self.data_offset + self.stride * self.height
+
+        self.file = open(path, "wb")
+        self.file.write(struct.pack("<2sIHHI", b"BM", file_size, 0, 0, self.data_offset))
+        self.file.write(struct.pack("<IiiHHIIiiII", 40, self.width, self.height, 1, bits, 0, self.stride * self.height, 2835, 2835, len(color_table) // 4, 0))
+        self.file.write(color_table)
+        self.file.truncate(file_size) # Reserving the whole file so the strips can be written in any order
+
+    def write(self, strip, top):
+        first_row = self.height - top - strip.height
+        self.file.seek(self.data_offset + first_row * self.stride)
+        self.file.write(strip.tobytes("raw", self.rawmodes[self.mode], self.stride, -1))
+
+    def close(self):
+        self.file.close()
+
+def batch_convert_worker(file_path, desired_type, profile_dir=None, events_path=None, memory_limit=None, frames="auto", signature=False):
+    # Runs inside a worker process, errors are returned instead of raised so one bad file doesnt stop the batch
+
+    start_time = time.perf_counter()
+    result = {'source': file_path, 'output': None, 'error': None, 'bytes_in': 0, 'bytes_out': 0}
+
+    worker_metrics = Metrics() # Sent back with the result since this process cant reach the parent's metrics
+    worker_metrics.profile_dir = profile_dir
+    worker_metrics.events_path = events_path
+
+    if memory_limit is not None: # The memory limit guards against huge images, so PIL's own pixel limit is not needed
+        Image.MAX_IMAGE_PIXELS = None
+
+    try:
+        with worker_metrics.profile(os.path.basename(file_path)):
+            result['bytes_in'] = os.path.getsize(file_path)
+
+            if signature: # Hashed here so incremental runs hash their sources in parallel
+                result['signature'] = source_signature(file_path)
+
+            result['output'] = save_image_as(file_path, desired_type, worker_metrics, memory_limit, frames)
+            result['bytes_out'] = os.path.getsize(result['output'])
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+        worker_metrics.failure("image_job", e)
+
+    result['seconds'] = time.perf_counter() - start_time
+    result['metrics'] = worker_metrics.snapshot()
+    return result
+
+def get_video_ext(new_type): # Turns "*.mp4", ".mp4" or "mp4" into ".mp4"
+    return "." + new_type.split(".")[-1].lower()
+
+def video_output_path(file_path, new_type): # The converted video goes next to the original with the new extension
+    file_name, current_extension = os.path.splitext(file_path)
+    return file_name + get_video_ext(new_type)
+
+def get_ffmpeg(): # Returns the ffmpeg binary, moviepy already ships one through imageio_ffmpeg
+
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except (ImportError, RuntimeError):
+        return "ffmpeg" # Falling back to the one on the PATH
+
+pipe_formats = { # ffmpeg muxer and flags for the containers that can be written to a pipe, avi and wmv have to seek back and go through a temporary file
+    ".mp4": ("mp4", ["-movflags", "frag_keyframe+empty_moov"]), # Fragmented, the normal layout needs to seek back to write the index
+    ".mov": ("mov", ["-movflags", "frag_keyframe+empty_moov"]),
+    ".mkv": ("matroska", []),
+}
+
+class VideoSource: # Feeds a video held in memory (bytes, bytearray, memoryview, mmap) or a file object to ffmpeg, as often as needed
+
+    chunk_size = 1024 * 1024
+
+    def __init__(self, source):
+
+        self.stream = None
+        self.data = None
+
+        if hasattr(source, "read") and not isinstance(source, mmap.mmap) and source.seekable():
+            self.stream = source
+            self.start = source.tell()
+        elif hasattr(source, "read") and not isinstance(source, mmap.mmap):
+            self.data = memoryview(source.read()) # A stream that cant seek can only be read once, but the probe and the conversion both need it
+        else:
+            self.data = memoryview(source).cast("B") # No copy for mmaps and buffers
+
+    def read_at(self, offset, size):
+
+        if self.data is not None:
+            return bytes(self.data[offset:offset + size])
+
+        self.stream.seek(self.start + offset)
+        return self.stream.read(size)
+
+    def size(self):
+
+        if self.data is not None:
+            return self.data.nbytes
+
+        return self.stream.seek(0, os.SEEK_END) - self.start
+
+    def chunks(self):
+
+        if self.data is not None:
+            for offset in range(0, self.data.nbytes, self.chunk_size):
+                yield self.data[offset:offset + self.chunk_size]
+        else:
+            self.stream.seek(self.start)
+            yield from iter(lambda: self.stream.read(self.chunk_size), b"")
+
+    def index_at_end(self): # mp4 and mov files keep their index (moov) before or after the media (mdat), ffmpeg can only read the first kind from a pipe
+
+        if self.read_at(4, 4) != b"ftyp":
+            return False
+
+        offset = 0
+        while True:
+            header = self.read_at(offset, 16)
+            if len(header) < 8:
+                return False
+
+            size, kind = struct.unpack(">I4s", header[:8])
+            if size == 1 and len(header) == 16: # 64 bit box size
+                size = struct.unpack(">Q", header[8:])[0]
+
+            if kind == b"moov":
+                return False
+            if kind == b"mdat":
+                return True
+            if size < 8: # Runs to the end of the file or is broken
+                return False
+
+            offset += size
+
+    def save_to(self, file_path): # For the inputs ffmpeg has to seek in
+        with open(file_path, "wb") as f:
+            for chunk in self.chunks():
+                f.write(chunk)
+
+def run_ffmpeg_pipe(arguments, source=None, writer=None): # Runs ffmpeg with the source on stdin and stdout going to writer, returns (exit code, stderr)
+
+    process = subprocess.Popen([get_ffmpeg(), "-hide_banner", *arguments], stdin=subprocess.PIPE if source is not None else subprocess.DEVNULL,
+                               stdout=subprocess.PIPE if writer is not None else subprocess.DEVNULL, stderr=subprocess.PIPE)
+    stderr = []
+
+    def feed(): # ffmpeg can stop reading early (the probe only reads the start), which is fine
+        try:
+            for chunk in source.chunks():
+                process.stdin.write(chunk)
+            process.stdin.close()
+        except (BrokenPipeError, OSError, ValueError):
+            pass
+
+    # stdin and stderr have their own threads so none of the pipes can fill up and block ffmpeg
+    threads = [threading.Thread(target=lambda: stderr.append(process.stderr.read()), daemon=True)]
+    if source is not None:
+        threads.append(threading.Thread(target=feed, daemon=True))
+
+    for thread in threads:
+        thread.start()
+
+    try:
+        if writer is not None:
+            for chunk in iter(lambda: process.stdout.read(VideoSource.chunk_size), b""):
+                writer.write(chunk)
+    except BaseException:
+        process.kill() # The output is too small or the caller gave up
+        raise
+    finally:
+        process.wait()
+
+        for thread in threads:
+            thread.join()
+
+    return process.returncode, b"".join(stderr).decode(errors="replace")
+
+def parse_probe(output, name): # Reads the duration and stream codecs from ffmpeg's input summary
+
+    streams = {'video': [], 'audio': [], 'duration': None}
+
+    for line in output.splitlines():
+        duration = re.search(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)", line)
+        if duration:
+            hours, minutes, seconds = duration.groups()
+            streams['duration'] = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+        stream = re.search(r"Stream #\d+:\d+.*?: (Video|Audio): (\w+)", line)
+        if stream and "(attached pic)" not in line: # Cover art is not a real video stream
+            streams[stream.group(1).lower()].append(stream.group(2))
+
+    if not streams['video'] and not streams['audio']:
+        raise OSError(f"ffmpeg could not read any streams from {name}")
+
+    return streams
+
+def probe_video(file_path): # Reads the duration and stream codecs of a video from ffmpeg's input summary
+
+    if not os.path.isfile(file_path):
+        raise FileNotFoundError(f"The file {file_path} was not found.")
+
+    # ffmpeg complains that no output was given but still prints the stream info to stderr
+    process = subprocess.run([get_ffmpeg(), "-hide_banner", "-i", file_path], capture_output=True, text=True, errors="replace")
+
+    return parse_probe(process.stderr, file_path)
+
+def probe_video_data(source): # Same as probe_video for a VideoSource, ffmpeg only reads the start of it
+    returncode, output = run_ffmpeg_pipe(["-i", "pipe:0"], source)
+    return parse_probe(output, "the video data")
+
+video_muxers = {".mp4": "mp4", ".mov": "mov", ".mkv": "matroska", ".avi": "avi", ".wmv": "asf"} # ffmpeg muxer for each video type
+
+format_codecs = { # yt_dlp codec strings (the part before the first dot) -> ffmpeg codec names, as used by remux_codecs
+    "avc1": "h264", "avc3": "h264", "h264": "h264", "hev1": "hevc", "hvc1": "hevc", "h265": "hevc", "vp9": "vp9", "vp09": "vp9",
+    "av01": "av1", "mp4a": "aac", "aac": "aac", "opus": "opus", "mp3": "mp3", "ac-3": "ac3", "ec-3": "eac3",
+}
+
+def format_streams(formats): # The streams of yt_dlp formats in probe_video's layout, None when a site doesnt say (or ffmpeg wouldnt know) the codecs
+
+    streams = {'video': [], 'audio': [], 'duration': None}
+
+    for media_format in formats:
+        for kind, key in (('video', 'vcodec'), ('audio', 'acodec')):
+            codec = media_format.get(key)
+
+            if codec == 'none': # Video only or audio only format
+                continue
+
+            codec = format_codecs.get((codec or "").split(".")[0].lower())
+            if codec is None:
+                return None
+
+            streams[kind].append(codec)
+
+    return streams
+
+def stream_input_arguments(media_format): # ffmpeg input options that read a yt_dlp format straight from the site, with the headers the site expects
+
+    arguments = []
+    headers = media_format.get('http_headers') or {}
+
+    if headers:
+        arguments += ["-headers", "".join(f"{name}: {value}\r\n" for name, value in headers.items())]
+
+    if media_format.get('protocol', 'https') in ("http", "https"): # Long downloads survive dropped connections
+        arguments += ["-reconnect", "1", "-reconnect_streamed", "1", "-reconnect_delay_max", "5"]
+
+    return arguments + ["-i", media_format['url']]
+
+def probe_media_formats(formats): # Reads the codecs of formats from the start of their streams, for sites that dont list them
+
+    arguments = []
+    for media_format in formats:
+        arguments += stream_input_arguments(media_format)
+
+    returncode, output = run_ffmpeg_pipe(arguments)
+    return parse_probe(output, "the media urls")
+
+class FfmpegProgress: # Turns ffmpeg's -progress output into fractions of the duration for a progress callback
+
+    def __init__(self, duration, progress):
+        self.duration = duration
+        self.progress = progress
+        self.pending = b"" # A line that was cut between two reads
+
+    def write(self, data):
+
+        lines = (self.pending + data).split(b"\n")
+        self.pending = lines.pop()
+
+        for line in lines:
+            if line.startswith(b"out_time_us=") and self.duration:
+                try:
+                    seconds = int(line.split(b"=", 1)[1]) / 1e6
+                except ValueError: # N/A before the first frame
+                    continue
+
+                self.progress(min(1.0, seconds / self.duration))
+
+def stream_convert(formats, output_file, new_type, method, duration=None, progress=None, streams=None):
+    # Lets ffmpeg download the formats and write output_file in new_type as the data arrives, method is "remux" or "transcode"
+    # Written to a .part file first so an interrupted run never leaves a broken video under the final name
+    # streams (probe_video's layout) and duration are what the output is checked against, ffmpeg can read a stream it cant seek in
+    # (an mp4 with its index at the end from a server without Range requests), log errors and still exit with 0, so any error counts
+
+    arguments = ["-y", "-v", "error", "-xerror"]
+
+    for media_format in formats:
+        arguments += stream_input_arguments(media_format)
+
+    for index in range(len(formats)): # Sites with separate video and audio formats give two inputs
+        arguments += ["-map", f"{index}:V?", "-map", f"{index}:a?"]
+
+    arguments += copy_arguments(streams, new_type) if method == "remux" else ["-c:v", "libx264", "-c:a", "aac"]
+
+    part_file = output_file + ".part"
+    arguments += ["-f", video_muxers[new_type], part_file]
+
+    writer = None
+    if progress is not None:
+        arguments = ["-progress", "pipe:1", "-nostats"] + arguments
+        writer = FfmpegProgress(duration, progress)
+
+    try:
+        returncode, errors = run_ffmpeg_pipe(arguments, None, writer)
+
+        if returncode != 0 or errors.strip(): # Copied streams are never decoded, so -xerror alone doesnt catch a garbled remux
+            raise subprocess.CalledProcessError(returncode, "ffmpeg", stderr=errors)
+
+        written = probe_video(part_file)
+
+        for kind in ("video", "audio"):
+            if streams is not None and streams[kind] and not written[kind]:
+                raise OSError(f"the {kind} stream is missing from the output")
+
+        if duration and (written['duration'] or 0.0) < duration * 0.95 - 0.5: # Some slack for containers that round or trim the end
+            raise OSError(f"the output is {written['duration'] or 0.0:.1f}s long instead of {duration:.1f}s")
+
+        os.replace(part_file, output_file)
+    finally:
+        if os.path.exists(part_file): # Failed or cancelled
+            os.remove(part_file)
+
+def copy_arguments(streams, new_type): # ffmpeg options that copy the streams, avi needs h264 in Annex B form instead of the mp4/mkv one
+
+    arguments = ["-c", "copy"]
+
+    if new_type == ".avi" and streams is not None and "h264" in streams['video']:
+        arguments += ["-bsf:v", "h264_mp4toannexb"]
+
+    return arguments
+
+def remux_video(file_path, output_file, streams, new_type): # Copies the video and audio streams into a new container without re-encoding them
+    subprocess.run(
+        [get_ffmpeg(), "-y", "-v", "error", "-i", file_path, "-map", "0:V", "-map", "0:a?", *copy_arguments(streams, new_type), output_file],
+        check=True, capture_output=True
+    )
+
+def transcode_video_parallel(file_path, output_file, workers=None, segment_seconds=60, progress=None): # Splits the video at keyframes, encodes the pieces side by side and joins them back together
+
+    ffmpeg = get_ffmpeg()
+    workers = workers or os.cpu_count() or 1
+    threads = max(1, (os.cpu_count() or 1) // workers) # Sharing the cores between the encoders instead of each one grabbing all of them
+
+    # The pieces are kept next to the output so the final join doesnt have to cross drives
+    with tempfile.TemporaryDirectory(prefix=".nt_segments_", dir=os.path.dirname(os.path.abspath(output_file))) as work_dir: # Hidden so watched folders ignore it
+
+        # Stream copying into segments can only cut on keyframes, so every piece starts with a clean frame
+        # Only the video is split, every aac piece would start with its own priming samples and the joined audio would drift
+        with metrics.span("video_split"):
+            subprocess.run(
+                [ffmpeg, "-y", "-v", "error", "-i", file_path, "-map", "0:V", "-c", "copy",
+                 "-f", "segment", "-segment_time", str(segment_seconds), "-reset_timestamps", "1",
+                 os.path.join(work_dir, "source_%05d.mkv")],
+                check=True, capture_output=True
+            )
+
+        segments = sorted(name for name in os.listdir(work_dir) if name.startswith("source_"))
+        audio_file = os.path.join(work_dir, "audio.mka") if probe_video(file_path)['audio'] else None
+
+        def encode_segment(name): # Each segment gets its own ffmpeg process
+            encoded = os.path.join(work_dir, name.replace("source_", "encoded_"))
+
+            with metrics.span("video_segment_encode"):
+                subprocess.run(
+                    [ffmpeg, "-y", "-v", "error", "-i", os.path.join(work_dir, name),
+                     "-c:v", "libx264", "-threads", str(threads), encoded],
+                    check=True, capture_output=True
+                )
+
+            return encoded
+
+        def encode_audio(): # The audio is cheap to encode, so it is done in one go next to the video segments
+            with metrics.span("video_audio_encode"):
+                subprocess.run(
+                    [ffmpeg, "-y", "-v", "error", "-i", file_path, "-map", "0:a", "-c:a", "aac", audio_file],
+                    check=True, capture_output=True
+                )
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            audio_future = executor.submit(encode_audio) if audio_file else None
+            futures = [executor.submit(encode_segment, name) for name in segments]
+
+            for finished, future in enumerate(as_completed(futures), start=1):
+                future.result() # Raises straight away if a segment failed
+                if progress is not None:
+                    progress(finished / len(futures))
+
+            encoded_segments = [future.result() for future in futures]
+
+            if audio_future is not None:
+                audio_future.result()
+
+        # The concat demuxer joins the encoded pieces and the audio is added back, neither is touched again
+        list_file = os.path.join(work_dir, "segments.txt")
+        with open(list_file, "w") as f:
+            for encoded in encoded_segments:
+                escaped = encoded.replace("'", "'\\''") # Quotes in the path have to be escaped for the concat list
+                f.write(f"file '{escaped}'\n")
+
+        with metrics.span("video_concat"):
+            subprocess.run(
+                [ffmpeg, "-y", "-v", "error", "-f", "concat", "-safe", "0", "-i", list_file] +
+                (["-i", audio_file, "-map", "0:v", "-map", "1:a"] if audio_file else []) + ["-c", "copy", output_file],
+                check=True, capture_output=True
+            )
+
+    return len(segments)
+
+def make_progress_hook(progress): # Turns yt_dlp's progress reports into calls to progress(fraction)
+
+    def progress_hook(status): # yt_dlp calls this every time a chunk is written
+        if progress is not None and status['status'] == 'downloading':
+            total = status.get('total_bytes') or status.get('total_bytes_estimate')
+            if total:
+                progress(status['downloaded_bytes'] / total)
+
+    return progress_hook
+
+def make_progress_logger(progress): # Turns moviepy's progress bars into calls to progress(fraction)
+
+    import proglog # Comes with moviepy
+
+    class ProgressLogger(proglog.ProgressBarLogger):
+
+        def bars_callback(self, bar, attr, value, old_value=None):
+            # The "t" bar counts the video frames, the audio bar before it is too quick to be worth showing
+            if bar == 't' and attr == 'index' and self.bars[bar]['total']:
+                progress(value / self.bars[bar]['total'])
+
+    return ProgressLogger()
+
+def write_file_atomic(path, data): # Written to a temporary file first so a crash cant leave half a file behind, data is str or bytes
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+
+    # Every write gets its own hidden temporary file, two threads saving at once would otherwise write into the same one
+    fd, temp_path = tempfile.mkstemp(prefix="." + os.path.basename(path) + ".", suffix=".tmp", dir=directory)
+
+    try:
+        with open(fd, "wb" if isinstance(data, bytes) else "w") as f:
+            f.write(data)
+
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+def file_digest(file_path, chunk_size=1024 * 1024): # sha256 of a file, read in chunks so big videos dont end up in memory
+
+    digest = hashlib.sha256()
+
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+def source_signature(file_path): # What the manifest remembers about a source, taken before converting so later edits are noticed
+    stat = os.stat(file_path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': file_digest(file_path)}
+
+class ConversionManifest: # Remembers what every output was made from so unchanged files can be skipped on the next run
+
+    def __init__(self, path=None, save_every=50):
+
+        self.path = path or os.path.join(get_cache_dir("conversions"), "manifest.json")
+        self.save_every = save_every # Saving after every file would rewrite the whole manifest thousands of times on big trees
+        self.entries = None # "source -> type" key -> entry, only read from disk when first needed
+        self.unsaved = 0
+        self.lock = threading.Lock() # Videos are converted from several threads
+        self.save_lock = threading.Lock() # Keeps saves in order, so an older snapshot never replaces a newer one
+
+    def load(self):
+
+        if self.entries is None:
+            try:
+                with open(self.path) as f:
+                    self.entries = json.load(f)['entries']
+            except (OSError, ValueError, KeyError): # No manifest yet or a broken one, everything is converted again
+                self.entries = {}
+
+    def save(self):
+
+        with self.save_lock: # The entries lock is only held for the snapshot, so workers can keep recording during the write
+            with self.lock:
+                if self.entries is None or not self.unsaved:
+                    return
+
+                data = json.dumps({'entries': self.entries})
+                self.unsaved = 0
+
+            write_file_atomic(self.path, data)
+
+    def key(self, file_path, new_type):
+        return f"{os.path.abspath(file_path)} -> {new_type.lower()}"
+
+    def up_to_date(self, file_path, new_type, params): # Returns the existing output when nothing changed since it was made, otherwise None
+
+        with self.lock:
+            self.load()
+            entry = self.entries.get(self.key(file_path, new_type))
+
+        if entry is None or entry['params'] != params:
+            return None
+
+        try:
+            output_stat = os.stat(entry['output'])
+            source_stat = os.stat(file_path)
+        except OSError: # The output was deleted (or the source is gone and the conversion will report it)
+            return None
+
+        if (output_stat.st_size, output_stat.st_mtime_ns) != (entry['output_size'], entry['output_mtime_ns']):
+            return None # The output was edited or replaced by something else
+
+        if source_stat.st_size != entry['size']:
+            return None
+
+        # Same size and mtime is trusted without reading the file, only touched files are hashed to see if the content changed
+        if source_stat.st_mtime_ns != entry['mtime_ns']:
+            if file_digest(file_path) != entry['sha256']:
+                return None
+
+            with self.lock:
+                entry['mtime_ns'] = source_stat.st_mtime_ns
+                self.unsaved += 1
+
+        return entry['output']
+
+    def record(self, file_path, new_type, params, output, signature): # signature comes from source_signature() before the conversion
+
+        output_stat = os.stat(output)
+        entry = dict(signature, params=params, output=os.path.abspath(output),
+                     output_size=output_stat.st_size, output_mtime_ns=output_stat.st_mtime_ns)
+
+        with self.lock:
+            self.load()
+            self.entries[self.key(file_path, new_type)] = entry
+            self.unsaved += 1
+            save_now = self.unsaved >= self.save_every
+
+        if save_now:
+            self.save()
+
+class FileConverter: # Handles file converting
+
+    def __init__(self, manifest=None):
+        self.manifest = manifest # A ConversionManifest turns on incremental mode, outputs that are up to date are skipped
+
+    supported_files = [ # This includes the types of files that the programm can convert          
+        ("All Supported Files", "*.png *.jpg *.jpeg *.gif *.bmp *.mp4 *.avi *.mov *.wmv *.mkv"), # All supported image and video formats
+        ("Image Files", "*.png *.jpg *.jpeg *.gif *.bmp"), # Image formats
+        ("Video Files", "*.mp4 *.avi *.mov *.wmv *.mkv"), # Video formats
+    ]
+
+    remux_codecs = { # The (video, audio) codecs each container can hold without re-encoding, None means anything goes
+        ".mp4": ({"h264", "hevc", "mpeg4", "av1", "vp9"}, {"aac", "mp3", "ac3", "eac3", "opus", "alac"}),
+        ".mov": ({"h264", "hevc", "mpeg4", "prores", "mjpeg"}, {"aac", "mp3", "ac3", "alac", "pcm_s16le"}),
+        ".mkv": (None, None),
+        ".avi": ({"mpeg4", "h264", "mjpeg", "msmpeg4v3"}, {"mp3", "ac3", "aac", "pcm_s16le"}),
+        ".wmv": ({"wmv1", "wmv2", "wmv3", "vc1"}, {"wmav1", "wmav2", "wmapro"}),
+    }
+
+    def convert_image(self, file_path, new_type):
+        # Ensure new_type does not include a leading dot and is in uppercase
+        desired_type = get_image_type(new_type)
+
+        try:
+            params = {'frames': "auto"}
+
+            if self.manifest is not None:
+                new_file_path = self.manifest.up_to_date(file_path, desired_type, params)
+
+                if new_file_path is not None:
+                    print(f"{new_file_path} is up to date, skipped")
+                    return new_file_path
+
+                signature = source_signature(file_path)
+
+            print(f"Saving image as {desired_type}")
+            new_file_path = save_image_as(file_path, desired_type)
+
+            if self.manifest is not None:
+                self.manifest.record(file_path, desired_type, params, new_file_path, signature)
+                self.manifest.save()
+
+            print(f"Image converted and saved as {new_file_path}")
+            return new_file_path
+
+        except FileNotFoundError as e:
+            metrics.failure("image_job", e)
+            print(f"Error: The file {file_path} was not found.")
+        
+        except IOError as e:
+            metrics.failure("image_job", e)
+            print(f"IOError: {e}. Cannot convert or save the image.")
+        
+        except Exception as e:
+            metrics.failure("image_job", e)
+            print(f"An unexpected error occurred: {e}")
+
+    def find_images(self, source, file_types=None): # Turns a list of paths, a directory or a glob pattern into a list of image paths
+
+        image_types = file_types or self.supported_files[1][1].split() # ["*.png", "*.jpg", ...]
+
+        if isinstance(source, (list, tuple)):
+            return list(source)
+
+        if os.path.isdir(source): # Folders inside it are included and extensions match in any case (IMG_0001.JPG)
+            return sorted(file_path for file_path in list_files([source])
+                          if any(fnmatch.fnmatch(os.path.basename(file_path).lower(), pattern) for pattern in image_types))
+
+        return sorted(glob.glob(source, recursive=True))
+
+    def convert_images(self, source, new_type, workers=None, max_in_flight=None, on_result=None, memory_limit=None, frames="auto"):
+        # Converts many images at once across a process pool, memory_limit (bytes) is per worker
+
+        desired_type = get_image_type(new_type)
+        paths = self.find_images(source)
+
+        workers = workers or os.cpu_count() or 1
+        max_in_flight = max_in_flight or workers * 2 # Only this many files are queued at once so huge folders dont fill up memory
+
+        results = []
+        start_time = time.perf_counter()
+        start_cpu = time.process_time()
+        params = {'frames': frames}
+
+        remaining = [] # Files already of the new type and up to date outputs never reach the pool
+
+        for file_path in paths:
+            if has_type(file_path, desired_type):
+                output = file_path # Already the new type (like the outputs of an earlier run), converting it again would only lose quality
+            elif self.manifest is not None:
+                output = self.manifest.up_to_date(file_path, desired_type, params)
+            else:
+                output = None
+
+            if output is None:
+                remaining.append(file_path)
+            else:
+                results.append({'source': file_path, 'output': output, 'error': None, 'skipped': True,
+                                'bytes_in': 0, 'bytes_out': 0, 'seconds': 0.0})
+
+        paths = remaining
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = set()
+            path_iter = iter(paths)
+
+            while True:
+                # Topping up the pool until the in flight limit is reached
+                for file_path in path_iter:
+                    pending.add(executor.submit(batch_convert_worker, file_path, desired_type, metrics.profile_dir, metrics.events_path,
+                                                 memory_limit, frames, self.manifest is not None))
+                    if len(pending) >= max_in_flight:
+                        break
+
+                if not pending:
+                    break
+
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    result = future.result()
+                    metrics.merge(result.pop('metrics'))
+                    results.append(result)
+
+                    if self.manifest is not None and result['error'] is None:
+                        self.manifest.record(result['source'], desired_type, params, result['output'], result.pop('signature'))
+
+                    if on_result is not None:
+                        on_result(result)
+
+        if self.manifest is not None:
+            self.manifest.save()
+
+        elapsed = time.perf_counter() - start_time
+        skipped = [result for result in results if result.get('skipped')]
+        converted = [result for result in results if result['error'] is None and not result.get('skipped')]
+
+        report = {
+            'files': len(results),
+            'converted': len(converted),
+            'skipped': len(skipped),
+            'failed': len(results) - len(converted) - len(skipped),
+            'workers': workers,
+            'seconds': elapsed,
+            'worker_seconds': sum(result['seconds'] for result in results), # Time spent converting summed over all workers
+            'parent_cpu_seconds': time.process_time() - start_cpu,
+            'files_per_second': len(results) / elapsed if elapsed > 0 else 0.0,
+            'mb_in_per_second': sum(result['bytes_in'] for result in converted) / 1e6 / elapsed if elapsed > 0 else 0.0,
+            'bytes_in': sum(result['bytes_in'] for result in converted),
+            'bytes_out': sum(result['bytes_out'] for result in converted),
+        }
+
+        up_to_date = f" ({report['skipped']} already {desired_type} or up to date)" if skipped else ""
+        print(f"Converted {report['converted']}/{report['files']} images{up_to_date} to {desired_type} in {elapsed:.2f}s "
+              f"({report['files_per_second']:.1f} files/s, {report['mb_in_per_second']:.1f} MB/s, {workers} workers)")
+
+        return results, report
+
+    def convert_video(self, file_path, new_type, allow_remux=True, parallel=False, workers=None, segment_seconds=60, progress=None):
+        try:
+            output_file, method = self.save_video_as(file_path, new_type, allow_remux, parallel, workers, segment_seconds, progress)
+
+            if self.manifest is not None:
+                self.manifest.save()
+
+            print(f"Video successfully converted ({method}) and saved as {output_file}")
+
+            return method
+
+        except JobCancelled:
+            raise
+        
+        except Exception as e:
+            metrics.failure("video_job", e)
+            print(f"An error occurred: {e}")
+
+    def save_video_as(self, file_path, new_type, allow_remux=True, parallel=False, workers=None, segment_seconds=60, progress=None):
+        # Converts the video and returns (output path, method used), errors are raised to the caller
+
+        # Construct the output file path
+        output_file = video_output_path(file_path, new_type)
+        new_type = get_video_ext(new_type)
+
+        if os.path.abspath(output_file) == os.path.abspath(file_path): # ffmpeg cant read and write the same file
+            raise ValueError(f"{file_path} already is a {new_type} file")
+
+        params = {'allow_remux': allow_remux} # Parallel or not gives the same kind of file, only remuxing changes it
+
+        if self.manifest is not None:
+            if self.manifest.up_to_date(file_path, new_type, params) is not None:
+                return output_file, "skipped, up to date"
+
+            signature = source_signature(file_path)
+
+        # If the streams already fit in the new container they are just copied over, which is way faster than re-encoding
+        method = None
+
+        if allow_remux:
+            try:
+                with metrics.span("video_probe"):
+                    streams = probe_video(file_path)
+
+                if self.can_remux(streams, new_type):
+                    with metrics.span("video_remux", target=new_type):
+                        remux_video(file_path, output_file, streams, new_type)
+                    method = "remux"
+            except (OSError, subprocess.CalledProcessError) as e:
+                print(f"Stream copy not possible ({e}), re-encoding instead")
+
+                if os.path.exists(output_file): # Whatever the failed copy wrote is broken
+                    os.remove(output_file)
+
+        if method is None and parallel:
+            with metrics.span("video_transcode", target=new_type, parallel=True):
+                segment_count = transcode_video_parallel(file_path, output_file, workers, segment_seconds, progress)
+            method = f"parallel transcode, {segment_count} segments"
+
+        if method is None:
+            from moviepy.editor import VideoFileClip # For file conversion
+
+            with metrics.span("video_transcode", target=new_type, parallel=False):
+                # Load the video file
+                video_clip = VideoFileClip(file_path)
+
+                # Write the video to the new file with specified format
+                logger = 'bar' if progress is None else make_progress_logger(progress)
+                video_clip.write_videofile(output_file, codec='libx264', audio_codec='aac', logger=logger)
+                video_clip.close()
+
+            method = "transcode"
+
+        metrics.count("bytes_in_total", os.path.getsize(file_path), kind="video")
+        metrics.count("bytes_out_total", os.path.getsize(output_file), kind="video")
+
+        if self.manifest is not None:
+            self.manifest.record(file_path, new_type, params, output_file, signature)
+
+        return output_file, method
+
+    def save_video_data(self, source, new_type, output=None, allow_remux=True):
+        # Converts a video held in memory (bytes, bytearray, memoryview, mmap or a file object) through ffmpeg's pipes
+        # Returns (the new video as bytes or the number of bytes written to output, method used), errors are raised to the caller
+        # mp4 and mov outputs are fragmented, only mp4/mov inputs with their index at the end and avi/wmv outputs need a temporary file
+
+        source = VideoSource(source)
+        new_type = get_video_ext(new_type)
+        writer = open_output(output)
+
+        input_file = source.index_at_end() # ffmpeg would have to seek to the end first
+        output_file = new_type not in pipe_formats
+
+        with contextlib.ExitStack() as stack:
+            if input_file or output_file:
+                work_dir = stack.enter_context(tempfile.TemporaryDirectory(prefix=".nt_pipe_"))
+
+            if input_file:
+                input_path = os.path.join(work_dir, "input.mp4")
+                source.save_to(input_path)
+                input_arguments, feed = ["-i", input_path], None
+            else:
+                input_arguments, feed = ["-i", "pipe:0"], source
+
+            # If the streams already fit in the new container they are just copied over, which is way faster than re-encoding
+            method = "transcode"
+
+            if allow_remux:
+                try:
+                    with metrics.span("video_probe"):
+                        streams = probe_video(input_path) if input_file else probe_video_data(source)
+
+                    if self.can_remux(streams, new_type):
+                        method = "remux"
+                except OSError as e:
+                    print(f"Stream copy not possible ({e}), re-encoding instead")
+
+            codec_arguments = ["-map", "0:V", "-map", "0:a?", *copy_arguments(streams, new_type)] if method == "remux" else ["-c:v", "libx264", "-c:a", "aac"]
+
+            if output_file:
+                output_path = os.path.join(work_dir, "output" + new_type)
+                output_arguments, pipe_writer = [output_path], None
+            else:
+                muxer, flags = pipe_formats[new_type]
+                output_arguments, pipe_writer = ["-f", muxer, *flags, "pipe:1"], writer
+
+            with metrics.span(f"video_{method}", target=new_type, pipe=True):
+                returncode, errors = run_ffmpeg_pipe(["-y", "-v", "error", *input_arguments, *codec_arguments, *output_arguments], feed, pipe_writer)
+
+            if returncode != 0:
+                raise subprocess.CalledProcessError(returncode, "ffmpeg", stderr=errors)
+
+            if output_file:
+                with open(output_path, "rb") as f:
+                    for chunk in iter(lambda: f.read(VideoSource.chunk_size), b""):
+                        writer.write(chunk)
+
+        result = finish_output(output, writer)
+
+        metrics.count("bytes_in_total", source.size(), kind="video")
+        metrics.count("bytes_out_total", len(result) if output is None else result, kind="video")
+
+        return result, method
+
+    def can_remux(self, streams, new_type): # Checks if every video and audio stream can be copied into the new container as is
+
+        if not streams['video']:
+            return False
+
+        video_codecs, audio_codecs = self.remux_codecs.get(new_type, (set(), set()))
+
+        if video_codecs is not None and not all(codec in video_codecs for codec in streams['video']):
+            return False
+
+        if audio_codecs is not None and not all(codec in audio_codecs for codec in streams['audio']):
+            return False
+
+        return True
+
+def normalize_url(link): # Turns the different ways of writing the same video link into one key
+
+    link = link.strip()
+
+    if "://" not in link:
+        link = "https://" + link
+
+    scheme, host, path, query, fragment = urlsplit(link)
+    host = host.lower()
+
+    for prefix in ("www.", "m.", "music."):
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+
+    params = parse_qsl(query)
+
+    if host == "youtu.be": # Short links only hold the video id in the path
+        return f"https://youtube.com/watch?v={path.strip('/')}"
+
+    if host == "youtube.com":
+        if path.startswith("/shorts/"):
+            return f"https://youtube.com/watch?v={path.split('/')[2]}"
+
+        video_id = dict(params).get("v")
+        if path == "/watch" and video_id:
+            return f"https://youtube.com/watch?v={video_id}" # Only the id matters since playlists are never downloaded
+
+    # Dropping tracking parameters and sorting the rest so their order doesnt matter
+    params = sorted((key, value) for key, value in params if not key.startswith("utm_") and key not in ("si", "feature"))
+
+    return urlunsplit((scheme.lower(), host, path, urlencode(params), ""))
+
+class InfoCache: # Remembers yt_dlp info dicts so the preview and the download dont both extract the same video
+
+    def __init__(self, ttl=600, max_entries=128):
+
+        self.ttl = ttl # Seconds an entry stays valid, the media urls inside an info dict expire after a while
+        self.max_entries = max_entries
+        self.entries = OrderedDict() # normalized url -> (time stored, info dict), oldest used first
+        self.lock = threading.Lock() # Previews and downloads run on different threads
+
+    def get(self, link):
+
+        key = normalize_url(link)
+
+        with self.lock:
+            entry = self.entries.get(key)
+
+            if entry is None:
+                return None
+
+            stored_at, info_dict = entry
+
+            if time.monotonic() - stored_at > self.ttl:
+                del self.entries[key]
+                return None
+
+            self.entries.move_to_end(key) # Marking it as recently used
+            return info_dict
+
+    def put(self, link, info_dict):
+
+        key = normalize_url(link)
+
+        with self.lock:
+            self.entries[key] = (time.monotonic(), info_dict)
+            self.entries.move_to_end(key)
+
+            while len(self.entries) > self.max_entries: # Dropping the least recently used entries
+                self.entries.popitem(last=False)
+
+    def remove(self, link):
+        with self.lock:
+            self.entries.pop(normalize_url(link), None)
+
+info_cache = InfoCache() # Shared by every YoutubeDownloader
+
+def get_cache_dir(name): # Where the app keeps its caches, following XDG_CACHE_HOME when it is set
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "nt_file_tools", name)
+
+http_session = None
+http_session_lock = threading.Lock()
+
+def get_http_session(): # One pooled requests session for the whole app so connections to the same host are reused
+
+    global http_session
+
+    with http_session_lock:
+        if http_session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=8, pool_maxsize=16) # Enough connections for several previews at once
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+
+            http_session = session
+
+    return http_session
+
+class ThumbnailCache: # Keeps downloaded thumbnails on disk, each one stored under the hash of its content
+
+    def __init__(self, directory=None, max_bytes=50 * 1024 * 1024):
+
+        self.directory = directory or get_cache_dir("thumbnails")
+        self.max_bytes = max_bytes # Oldest thumbnails are deleted once the cache grows past this
+        self.index_path = os.path.join(self.directory, "index.json")
+        self.index = None # url -> content hash, only read from disk when first needed
+        self.lock = threading.Lock()
+
+    def load_index(self):
+
+        if self.index is None:
+            try:
+                with open(self.index_path) as f:
+                    self.index = json.load(f)
+            except (OSError, ValueError): # No cache yet or a broken index, starting from scratch either way
+                self.index = {}
+
+    def save_index(self):
+        write_file_atomic(self.index_path, json.dumps(self.index))
+
+    def blob_path(self, digest):
+        return os.path.join(self.directory, digest)
+
+    def get(self, url): # Returns the path of the cached thumbnail or None
+
+        with self.lock:
+            self.load_index()
+            digest = self.index.get(url)
+
+            if digest is None:
+                return None
+
+            path = self.blob_path(digest)
+
+            try:
+                os.utime(path) # Marks it as recently used for the eviction
+            except FileNotFoundError:
+                del self.index[url] # It was evicted or deleted by hand
+                return None
+
+            return path
+
+    def put(self, url, data): # Stores the thumbnail and returns its path, identical images are only stored once
+
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.blob_path(digest)
+
+        with self.lock:
+            os.makedirs(self.directory, exist_ok=True)
+            self.load_index()
+
+            if not os.path.exists(path):
+                write_file_atomic(path, data)
+
+            self.index[url] = digest
+            self.evict(keep=digest)
+            self.save_index()
+
+        return path
+
+    def evict(self, keep): # Deletes the least recently used thumbnails until the cache fits in max_bytes again
+
+        blobs = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and len(entry.name) == 64: # Only content hashes, not the index
+                stat = entry.stat()
+                blobs.append((stat.st_mtime, stat.st_size, entry.name))
+
+        total = sum(size for _, size, _ in blobs)
+
+        for _, size, digest in sorted(blobs):
+            if total <= self.max_bytes:
+                break
+
+            if digest == keep:
+                continue
+
+            os.remove(self.blob_path(digest))
+            total -= size
+
+            self.index = {url: value for url, value in self.index.items() if value != digest}
+
+thumbnail_cache = ThumbnailCache() # Shared by every YoutubeDownloader
+
+preview_cache = ThumbnailCache(get_cache_dir("previews"), max_bytes=100 * 1024 * 1024) # Same eviction as the thumbnails, keyed by file instead of url
+
+def sample_digest(file_path, sample_size=64 * 1024): # Hash of the size and three samples of a file, hashing a multi GB video would take longer than the preview
+    size = os.path.getsize(file_path)
+    digest = hashlib.sha256(str(size).encode())
+
+    with open(file_path, "rb") as f:
+        for offset in (0, max(0, size // 2 - sample_size // 2), max(0, size - sample_size)):
+            f.seek(offset)
+            digest.update(f.read(sample_size))
+
+    return digest.hexdigest()
+
+class VideoPreviewer: # Poster frames and contact sheets that only decode the few keyframes they need, so big files preview as fast as small ones
+
+    background = (41, 41, 41) # Same as the app (#292929)
+
+    def __init__(self, cache=None, workers=None):
+        self.cache = cache if cache is not None else preview_cache
+        self.workers = workers or min(8, os.cpu_count() or 1) # Frames of a contact sheet are grabbed side by side
+
+    def grab_frame(self, file_path, seconds, width): # Decodes the keyframe at or just before seconds scaled down to width, returns (frame, its time)
+
+        # -ss before -i jumps there in the container instead of decoding from the start, -skip_frame nokey keeps the decoder off every
+        # other frame and -noaccurate_seek returns that keyframe instead of decoding on to the exact time
+        # -copyts keeps the keyframe's real time, otherwise it would be before the seek point and dropped, showinfo prints that time
+        frame_data = BytesIO()
+
+        with metrics.span("preview_frame"):
+            returncode, output = run_ffmpeg_pipe(
+                ["-v", "info", "-skip_frame", "nokey", "-copyts", "-noaccurate_seek", "-ss", f"{seconds:.3f}", "-i", file_path,
+                 "-an", "-sn", "-dn", "-frames:v", "1", "-vf", f"showinfo,scale={width}:-2:flags=fast_bilinear", "-f", "image2pipe", "-c:v", "bmp", "pipe:1"],
+                None, frame_data
+            )
+
+        if returncode != 0 or not frame_data.getbuffer().nbytes:
+            errors = [line for line in output.splitlines() if "error" in line.lower()]
+            raise OSError(f"ffmpeg could not read a frame at {seconds:.1f}s from {file_path}" + (f": {errors[-1]}" if errors else ""))
+
+        frame_time = re.search(r"pts_time:(-?[\d.]+)", output)
+
+        frame = Image.open(frame_data)
+        frame.load()
+        return frame, float(frame_time.group(1)) if frame_time else seconds
+
+    def cached(self, key, make): # Returns the cached preview for key, or makes and stores it
+
+        cached_path = self.cache.get(key)
+
+        if cached_path is not None:
+            metrics.count("preview_cache_total", result="hit")
+
+            with Image.open(cached_path) as img:
+                img.load()
+                return img
+
+        metrics.count("preview_cache_total", result="miss")
+        img = make()
+
+        encoded = BytesIO()
+        img.save(encoded, format="JPEG", quality=85)
+        self.cache.put(key, encoded.getvalue())
+
+        return img
+
+    def poster(self, file_path, width=320): # A single frame from a tenth of the way in, which skips black intros and fades
+
+        def make():
+            duration = probe_video(file_path)['duration'] or 0.0
+            frame, frame_time = self.grab_frame(file_path, duration * 0.1, width)
+            return frame.convert("RGB")
+
+        return self.cached(f"poster {sample_digest(file_path)} {width}", make)
+
+    def contact_sheet(self, file_path, frames=9, columns=3, tile_width=320): # frames evenly spread frames in a grid, each with its time
+
+        def make():
+            duration = probe_video(file_path)['duration'] or 0.0
+            times = [duration * (index + 0.5) / frames for index in range(frames)]
+
+            def grab(seconds):
+                try:
+                    frame, frame_time = self.grab_frame(file_path, seconds, tile_width)
+                    return frame.convert("RGB"), frame_time
+                except OSError: # A broken spot in the file only leaves its tile empty
+                    return None, seconds
+
+            with ThreadPoolExecutor(max_workers=min(self.workers, frames)) as executor:
+                tiles, times = zip(*executor.map(grab, times)) # The labels show when each keyframe really is
+
+            if not any(tiles):
+                raise OSError(f"ffmpeg could not read any frames from {file_path}")
+
+            return self.draw_sheet(tiles, times, columns, tile_width)
+
+        return self.cached(f"sheet {sample_digest(file_path)} {frames} {columns} {tile_width}", make)
+
+    def draw_sheet(self, tiles, times, columns, tile_width):
+        from PIL import ImageDraw
+
+        gap = 4
+        tile_height = max(tile.height for tile in tiles if tile is not None)
+        rows = (len(tiles) + columns - 1) // columns
+
+        sheet = Image.new("RGB", (columns * (tile_width + gap) + gap, rows * (tile_height + gap) + gap), self.background)
+        draw = ImageDraw.Draw(sheet)
+
+        for index, (tile, seconds) in enumerate(zip(tiles, times)):
+            x = gap + (index % columns) * (tile_width + gap)
+            y = gap + (index // columns) * (tile_height + gap)
+
+            if tile is not None:
+                sheet.paste(tile, (x, y))
+
+            label = f"{int(seconds // 3600)}:{int(seconds % 3600 // 60):02d}:{int(seconds % 60):02d}"
+            draw.text((x + 5, y + 5), label, fill="black") # Shadow so the time is readable on light frames too
+            draw.text((x + 4, y + 4), label, fill="white")
+
+        return sheet
+
+
+def download_template(filename=None): # The yt_dlp output template for a download, without the extension
+
+    if filename is None:
+        return '%(title)s [%(id)s]' # Unique and the same on every run, so interrupted downloads can be picked up again
+
+    return filename.replace('/', '_').replace('\\', '_')  # Ensures it doesnt contain invalid characters
+
+class YoutubeDownloader: #Handles youtube downloading
+
+    def __init__(self, cache=None, thumbnails=None):
+        self.cache = cache if cache is not None else info_cache
+        self.thumbnails = thumbnails if thumbnails is not None else thumbnail_cache
+
+    def get_info(self, link): # Returns the info dict of the video, only extracting it when it isnt cached yet
+
+        info_dict = self.cache.get(link)
+
+        if info_dict is not None:
+            metrics.count("info_cache_total", result="hit")
+            return info_dict
+
+        metrics.count("info_cache_total", result="miss")
+
+        ydl_opts = {
+            'quiet': True,  # Suppress output messages
+            'noplaylist': True,  # Don't download playlists
+            'skip_download': True,  # Only extract info, don't download
+        }
+
+        import yt_dlp as youtube_dl
+
+        with youtube_dl.YoutubeDL(ydl_opts) as ydl:
+            with metrics.span("metadata_extraction"):
+                info_dict = ydl.extract_info(link, download=False)
+
+        self.cache.put(link, info_dict)
+        return info_dict
+
+    def get_vid(self, link):
+
+        try:
+            info_dict = self.get_info(link)
+            return info_dict['title'], info_dict['thumbnail']
+        except Exception as e:
+            metrics.failure("lookup_job", e)
+            print(f"Error downloading video: {e}")
+    
+    def download_thumbnail(self, thumbnail_url, size=None): # Downloads the vid thumbnail so that it can be displayed to the user
+
+        thumbnail_path = self.thumbnails.get(thumbnail_url)
+
+        if thumbnail_path is None: # Only going to the network the first time a thumbnail is seen
+            metrics.count("thumbnail_cache_total", result="miss")
+
+            with metrics.span("thumbnail_fetch"):
+                response = get_http_session().get(thumbnail_url, timeout=10)
+                response.raise_for_status()
+
+            metrics.count("bytes_in_total", len(response.content), kind="thumbnail")
+            thumbnail_path = self.thumbnails.put(thumbnail_url, response.content)
+        else:
+            metrics.count("thumbnail_cache_total", result="hit")
+
+        return self.load_thumbnail(thumbnail_path, size)
+
+    def load_thumbnail(self, thumbnail_path, size=None): # Decodes a cached thumbnail, scaled to size when given
+
+        with metrics.span("thumbnail_decode"):
+            img = Image.open(thumbnail_path)
+
+            if size is not None:
+                img.draft('RGB', size) # Lets jpegs decode straight at a fraction of their full size
+                img = img.resize(size, Image.LANCZOS)
+            else:
+                img.load()
+
+        return img
+
+    def download_vid(self, link, download_dir, filename='video', progress=None):
+
+        try:
+            self.fetch_vid(link, download_dir, filename, [make_progress_hook(progress)])
+            return True
+        except JobCancelled:
+            raise
+        except Exception as e:
+            metrics.failure("download_job", e)
+            print(f"Error downloading video: {e}")
+
+    def fetch_vid(self, link, download_dir, filename=None, hooks=()): # Downloads the video and returns its path, errors are raised to the caller
+
+        filename = download_template(filename)
+
+        ydl_opts = {
+            'format': 'best',  # Download the best quality
+            'outtmpl': os.path.join(download_dir, f'{filename}.%(ext)s'),  
+            'noplaylist': True,  # Don't download playlists
+            'continuedl': True, # Resumes from the .part file if an earlier download was interrupted
+            'progress_hooks': list(hooks),
+        }
+        
+        import yt_dlp as youtube_dl
+
+        with youtube_dl.YoutubeDL(ydl_opts) as ydl, metrics.span("download"):
+            info_dict = self.cache.get(link)
+
+            try:
+                if info_dict is None:
+                    raise LookupError("not cached")
+
+                # Reusing the info from the preview, yt_dlp only has to pick the format and download it
+                result = ydl.process_ie_result(ydl.sanitize_info(info_dict, remove_private_keys=True), download=True)
+            except (JobCancelled, KeyboardInterrupt):
+                raise
+            except Exception:
+                # The cached info was missing or its media urls expired, so it is extracted again while downloading
+                self.cache.remove(link)
+                result = ydl.extract_info(link, download=True)
+
+            if result.get('requested_downloads'):
+                downloaded_file = result['requested_downloads'][0]['filepath'] # The real name of the file, extension included
+            else:
+                downloaded_file = ydl.prepare_filename(result)
+
+        current_time = time.time()
+        os.utime(downloaded_file, (current_time, current_time)) # Fixes a bug where the file creation time was incorrect
+
+        metrics.count("bytes_in_total", os.path.getsize(downloaded_file), kind="download")
+
+        return downloaded_file
+
+    stream_protocols = ("http", "https", "m3u8", "m3u8_native") # What ffmpeg can read straight from the site
+
+    def download_converted(self, link, download_dir, new_type, filename=None, allow_remux=True, progress=None, converter=None):
+        # Downloads the video straight into new_type and returns (path, method), errors are raised to the caller
+        # ffmpeg reads the media itself so downloading and converting overlap and only the final file is written. Formats it cant read
+        # are downloaded first and converted afterwards, that download is deleted once the conversion is done
+
+        converter = converter or FileConverter()
+        new_type = get_video_ext(new_type)
+        info_dict = self.get_info(link)
+        formats = info_dict.get('requested_formats') or [info_dict] # Separate video and audio formats when the site has them
+
+        filename = download_template(filename) # Same name as fetch_vid would use
+
+        import yt_dlp as youtube_dl
+
+        with youtube_dl.YoutubeDL({'outtmpl': os.path.join(download_dir, filename + new_type)}) as ydl:
+            output_file = ydl.prepare_filename(info_dict)
+
+        if all(media_format.get('url') and media_format.get('protocol', 'https') in self.stream_protocols for media_format in formats):
+            try:
+                method = "transcode"
+                duration = info_dict.get('duration')
+                streams = format_streams(formats) # None when the site doesnt say, then only the duration is checked
+
+                if allow_remux:
+                    with metrics.span("video_probe"):
+                        streams = streams or probe_media_formats(formats)
+
+                    if converter.can_remux(streams, new_type):
+                        method = "remux"
+
+                    duration = duration or streams['duration'] # Some sites dont report it, the progress needs it
+
+                with metrics.span("download_convert", target=new_type, method=method):
+                    stream_convert(formats, output_file, new_type, method, duration, progress, streams)
+
+                metrics.count("bytes_out_total", os.path.getsize(output_file), kind="video")
+                return output_file, f"stream {method}"
+            except (OSError, subprocess.CalledProcessError) as e:
+                reason = (getattr(e, 'stderr', None) or str(e)).strip().splitlines()[-1] # ffmpeg's last complaint says the most
+                print(f"Could not convert while downloading ({reason}), downloading first instead")
+                self.cache.remove(link) # The media urls may have expired, fetch_vid extracts them again
+
+        # The download counts for the first half of the progress
+        progress_hook = make_progress_hook(None if progress is None else lambda fraction: progress(fraction / 2))
+
+        # Hidden folder next to the final file, so the conversion doesnt cross drives and watched folders ignore it
+        work_dir = tempfile.mkdtemp(prefix=".nt_download_", dir=download_dir)
+
+        try:
+            downloaded_file = self.fetch_vid(link, work_dir, filename, [progress_hook])
+
+            if os.path.splitext(downloaded_file)[1].lower() == new_type:
+                converted_file, method = downloaded_file, "download"
+            else:
+                converted_file, method = converter.save_video_as(downloaded_file, new_type, allow_remux,
+                                                                 progress=None if progress is None else lambda fraction: progress(0.5 + fraction / 2))
+                method = f"download + {method}"
+
+            os.replace(converted_file, output_file)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        return output_file, method
+
+    def expand_link(self, link): # Turns a playlist link into the links of its videos, other links are returned as they are
+
+        ydl_opts = {
+            'quiet': True,  # Suppress output messages
+            'skip_download': True,  # Only extract info, don't download
+            'extract_flat': 'in_playlist', # Only lists the playlist entries instead of extracting every video
+        }
+
+        import yt_dlp as youtube_dl
+
+        with youtube_dl.YoutubeDL(ydl_opts) as ydl:
+            info_dict = ydl.extract_info(link, download=False)
+
+        if info_dict.get('_type') != 'playlist':
+            self.cache.put(link, info_dict) # A single video was fully extracted, so the download can reuse it
+            return [link]
+
+        links = []
+        for entry in info_dict.get('entries') or []:
+            if entry:
+                links.append(entry.get('webpage_url') or entry.get('url'))
+
+        return links
+
+class AsyncYoutubeDownloader: # asyncio front end for YoutubeDownloader, so many links can be looked up at once
+    # yt_dlp is blocking, so it runs in a bounded thread pool. Thumbnails are fetched with aiohttp when it is installed, through the pool otherwise
+    # Timeouts and cancelling stop the waiting right away, an extraction that already started finishes in its thread (yt_dlp cant be interrupted)
+
+    def __init__(self, downloader=None, max_workers=8, timeout=30.0, thumbnail_timeout=10.0):
+        self.downloader = downloader or YoutubeDownloader()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="nt_async")
+        self.timeout = timeout # Default for every call, None waits forever
+        self.thumbnail_timeout = thumbnail_timeout
+        self.http = None # aiohttp session, made on first use since it belongs to the running loop (False when aiohttp is missing)
+        self.lookups = {} # normalized url -> future, so the same link asked for twice at once is only extracted once
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+
+        if self.http:
+            await self.http.close()
+
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def offload(self, function, *args): # Runs a blocking function in the pool, the returned future can be awaited
+        import asyncio
+        return asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    async def run(self, function, *args, timeout=None): # Same as offload but waits at most timeout seconds (self.timeout by default)
+        import asyncio
+        return await asyncio.wait_for(self.offload(function, *args), timeout if timeout is not None else self.timeout)
+
+    async def get_info(self, link, timeout=None): # Returns the info dict, errors and timeouts are raised
+        import asyncio
+
+        key = normalize_url(link)
+        lookup = self.lookups.get(key)
+
+        if lookup is None:
+            lookup = self.offload(self.downloader.get_info, link)
+            self.lookups[key] = lookup
+
+            def forget(lookup):
+                self.lookups.pop(key, None)
+                if not lookup.cancelled():
+                    lookup.exception() # Marks the error as seen when every caller already gave up
+
+            lookup.add_done_callback(forget)
+
+        # Shielded so one caller timing out doesnt cancel the lookup for the others
+        return await asyncio.wait_for(asyncio.shield(lookup), timeout if timeout is not None else self.timeout)
+
+    async def get_vid(self, link, timeout=None): # Returns (title, thumbnail url)
+        info_dict = await self.get_info(link, timeout)
+        return info_dict['title'], info_dict['thumbnail']
+
+    async def get_vids(self, links, timeout=None): # Looks up every link at once, returns (title, thumbnail url) or the exception for each link in order
+        import asyncio
+        return await asyncio.gather(*(self.get_vid(link, timeout) for link in links), return_exceptions=True)
+
+    async def fetch_thumbnail(self, thumbnail_url): # The raw thumbnail, through aiohttp's connection pool when it is installed
+
+        if self.http is None:
+            try:
+                import aiohttp
+                self.http = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=16, limit_per_host=8)) # Same limits as the requests session
+            except ImportError:
+                self.http = False
+
+        if not self.http:
+            def fetch():
+                response = get_http_session().get(thumbnail_url, timeout=self.thumbnail_timeout)
+                response.raise_for_status()
+                return response.content
+
+            return await self.offload(fetch) # The caller's timeout covers the whole download
+
+        async with self.http.get(thumbnail_url) as response:
+            response.raise_for_status()
+            return await response.read()
+
+    async def download_thumbnail(self, thumbnail_url, size=None, timeout=None): # Same as YoutubeDownloader.download_thumbnail
+        import asyncio
+
+        # The cache reads its index, touches and writes files and evicts old ones, so it goes through the pool like everything else that blocks
+        thumbnail_path = await self.offload(self.downloader.thumbnails.get, thumbnail_url)
+
+        if thumbnail_path is None: # Only going to the network the first time a thumbnail is seen
+            metrics.count("thumbnail_cache_total", result="miss")
+
+            with metrics.span("thumbnail_fetch"):
+                content = await asyncio.wait_for(self.fetch_thumbnail(thumbnail_url), timeout if timeout is not None else self.thumbnail_timeout)
+
+            metrics.count("bytes_in_total", len(content), kind="thumbnail")
+            thumbnail_path = await self.offload(self.downloader.thumbnails.put, thumbnail_url, content)
+        else:
+            metrics.count("thumbnail_cache_total", result="hit")
+
+        return await self.run(self.downloader.load_thumbnail, thumbnail_path, size) # Decoding is cpu work, kept off the loop
+
+    async def download_vid(self, link, download_dir, filename=None, progress=None, timeout=None):
+        # Downloads the video and returns its path, progress(fraction) is called on the loop
+        # Unlike the lookups there is no default timeout, cancelling (or timing out) stops the download at its next chunk
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        cancel_event = threading.Event()
+
+        report_progress = make_progress_hook(None if progress is None else lambda fraction: loop.call_soon_threadsafe(progress, fraction))
+
+        def progress_hook(status):
+            if cancel_event.is_set():
+                raise JobCancelled()
+
+            report_progress(status)
+
+        try:
+            return await asyncio.wait_for(self.offload(self.downloader.fetch_vid, link, download_dir, filename, [progress_hook]), timeout)
+        except (asyncio.CancelledError, asyncio.TimeoutError):
+            cancel_event.set()
+            raise
+
+class DownloadManager: # Downloads many links and playlists side by side and remembers where it stopped between runs
+
+    def __init__(self, download_dir, state_path=None, max_workers=4, max_per_host=2, downloader=None, new_type=None):
+
+        if max_workers < 1 or max_per_host < 1: # Nothing could ever start, run() would wait forever
+            raise ValueError(f"max_workers and max_per_host have to be at least 1, got {max_workers} and {max_per_host}")
+
+        self.download_dir = download_dir
+        self.new_type = get_video_ext(new_type) if new_type else None # When set every video is converted to this type while it downloads
+        self.state_path = state_path or os.path.join(download_dir, ".nt_downloads.json")
+        self.max_workers = max_workers
+        self.max_per_host = max_per_host # Most sites throttle or block too many connections from one client
+        self.downloader = downloader or YoutubeDownloader()
+
+        self.items = [] # One dict per video, see add()
+        self.lock = threading.Lock() # The workers update the items and the state file
+        self.session_bytes = 0 # Bytes downloaded during this run, used for the bandwidth report
+
+        self.load_state()
+
+    def load_state(self): # Picks up the queue from an earlier run
+
+        try:
+            with open(self.state_path) as f:
+                self.items = json.load(f)['items']
+        except (OSError, ValueError, KeyError):
+            self.items = []
+
+        for item in self.items:
+            if item['status'] == 'downloading': # The app was stopped during this download, yt_dlp resumes its .part file
+                item['status'] = 'pending'
+
+    def save_state(self):
+
+        with self.lock:
+            data = json.dumps({'download_dir': self.download_dir, 'items': self.items}, indent=1)
+
+        write_file_atomic(self.state_path, data)
+
+    def add(self, links): # Queues links, playlists are expanded into their videos and links that are already queued are skipped
+        # Returns the items of the links, new or from an earlier run
+
+        # The same video converted to another type is another item, it doesnt count as downloaded yet
+        known = {(normalize_url(item['url']), item.get('to')): item for item in self.items}
+        added = OrderedDict() # The same video can be in several of the playlists
+
+        for link in links:
+            try:
+                video_links = self.downloader.expand_link(link)
+            except Exception as e:
+                print(f"Could not read {link}: {e}")
+                video_links = [link] # Queued anyway so the error shows up in the results
+
+            for video_link in video_links:
+                key = (normalize_url(video_link), self.new_type)
+
+                if key not in known:
+                    known[key] = {
+                        'url': video_link,
+                        'host': urlsplit(video_link).hostname or '',
+                        'to': self.new_type, # None keeps the file as downloaded
+                        'status': 'pending', # pending, downloading, done or failed
+                        'filepath': None,
+                        'error': None,
+                        'downloaded_bytes': 0,
+                        'total_bytes': None,
+                    }
+                    self.items.append(known[key])
+
+                added[key] = known[key]
+
+        self.save_state()
+        return list(added.values())
+
+    def run(self, retry_failed=False, on_update=None): # Downloads everything that is still pending and returns a report
+
+        if retry_failed:
+            for item in self.items:
+                if item['status'] == 'failed':
+                    item['status'] = 'pending'
+
+        pending = [item for item in self.items if item['status'] == 'pending']
+        running = {} # future -> item
+        self.session_bytes = 0
+        start_time = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pending or running:
+
+                # Starting every pending download whose host still has a free slot
+                for item in list(pending):
+                    if len(running) >= self.max_workers:
+                        break
+
+                    host_count = sum(1 for other in running.values() if other['host'] == item['host'])
+                    if host_count >= self.max_per_host:
+                        continue
+
+                    pending.remove(item)
+                    item['status'] = 'downloading'
+                    running[executor.submit(self.download_item, item)] = item
+
+                self.save_state()
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    item = running.pop(future)
+
+                    try:
+                        item['filepath'] = future.result()
+                        item['status'] = 'done'
+                    except Exception as e:
+                        item['status'] = 'failed'
+                        item['error'] = f"{type(e).__name__}: {e}"
+                        metrics.failure("download_job", e)
+
+                    if on_update is not None:
+                        on_update(item)
+
+            self.save_state()
+
+        elapsed = time.perf_counter() - start_time
+
+        report = {
+            'items': len(self.items),
+            'done': sum(1 for item in self.items if item['status'] == 'done'),
+            'failed': sum(1 for item in self.items if item['status'] == 'failed'),
+            'pending': sum(1 for item in self.items if item['status'] == 'pending'),
+            'bytes': self.session_bytes,
+            'seconds': elapsed,
+            'bytes_per_second': self.session_bytes / elapsed if elapsed > 0 else 0.0,
+        }
+
+        print(f"Downloaded {report['done']}/{report['items']} videos, {self.session_bytes / 1e6:.1f} MB in {elapsed:.1f}s "
+              f"({report['bytes_per_second'] / 1e6:.2f} MB/s)")
+
+        return report
+
+    def download_item(self, item): # Runs on a worker thread
+
+        last_bytes = [None] # The first report of a resumed download includes the bytes from the earlier run, so it only sets the baseline
+
+        def bandwidth_hook(status):
+            if status['status'] != 'downloading':
+                return
+
+            downloaded = status.get('downloaded_bytes') or 0
+
+            with self.lock:
+                if last_bytes[0] is not None:
+                    self.session_bytes += max(0, downloaded - last_bytes[0])
+
+                last_bytes[0] = downloaded
+                item['downloaded_bytes'] = downloaded
+                item['total_bytes'] = status.get('total_bytes') or status.get('total_bytes_estimate')
+
+        with metrics.profile(item['url']):
+            if item.get('to') is None:
+                return self.downloader.fetch_vid(item['url'], self.download_dir, hooks=[bandwidth_hook])
+
+            # ffmpeg does the downloading here, so only the finished file tells how much came in
+            output_file, method = self.downloader.download_converted(item['url'], self.download_dir, item['to'])
+
+            with self.lock:
+                item['downloaded_bytes'] = item['total_bytes'] = os.path.getsize(output_file)
+                self.session_bytes += item['downloaded_bytes']
+
+            return output_file
+
+class JobCancelled(Exception): # Raised inside a job once the user has cancelled it
+    pass
+
+class Job: # A single background task that the ui can follow and cancel
+
+    def __init__(self, job_id, name, scheduler):
+
+        self.id = job_id
+        self.name = name
+        self.scheduler = scheduler
+
+        self.status = "queued" # queued, running, done, failed or cancelled
+        self.progress = None # Between 0 and 1, None while it is unknown
+        self.result = None
+        self.error = None
+        self.on_done = None
+        self.use_process = False
+        self.future = None
+        self.finished_at = None
+
+        self.cancel_event = threading.Event()
+
+    def set_progress(self, fraction): # Called from the worker, the ui picks it up on its next poll
+        self.check_cancelled()
+        self.scheduler.events.put(("progress", self, fraction))
+
+    def check_cancelled(self): # Lets long running work stop at a safe point
+        if self.cancel_event.is_set():
+            raise JobCancelled(self.name)
+
+    def can_cancel(self): # Process jobs have no way to hear about the cancel once they run, only queued ones can still be dropped
+        return self.status == "queued" or (self.status == "running" and not self.use_process)
+
+class JobScheduler: # Runs heavy work away from the Tk thread and hands the results back through a queue that Tk polls with after()
+
+    poll_interval = 50 # Milliseconds between polls
+    max_events_per_poll = 200 # Stops a flood of progress updates from freezing the ui
+    finished_display_time = 5 # Seconds a finished job stays in the list
+
+    def __init__(self, thread_workers=4, process_workers=None):
+
+        self.events = queue.Queue()
+        self.thread_pool = ThreadPoolExecutor(max_workers=thread_workers) # For downloads and anything that mostly waits
+        self.process_workers = process_workers
+        self.process_pool = None # Only started the first time a cpu heavy job comes in
+
+        self.jobs = {}
+        self.next_id = 1
+
+        self.root = None
+        self.on_change = None # Called on the Tk thread whenever a job changes
+
+    def attach(self, root): # Starts polling on the given root, needed every time the root is replaced
+
+        if self.root is root:
+            return
+
+        self.root = root
+        self.root.after(self.poll_interval, self.poll)
+
+    def submit(self, name, function, *args, on_done=None, use_process=False):
+        # Thread jobs get the job as their first argument so they can report progress and check for cancellation,
+        # process jobs only get their arguments since the job cant be sent to another process
+
+        job = Job(self.next_id, name, self)
+        job.on_done = on_done
+        job.use_process = use_process
+        self.next_id += 1
+        self.jobs[job.id] = job
+
+        if use_process:
+            if self.process_pool is None:
+                # Forking the Tk process while its threads (the thread pool, the import warm up) hold locks can deadlock the child,
+                # spawned workers start from a clean interpreter instead
+                self.process_pool = ProcessPoolExecutor(max_workers=self.process_workers, mp_context=multiprocessing.get_context("spawn"))
+
+            job.future = self.process_pool.submit(function, *args)
+            job.future.add_done_callback(lambda future: self.events.put(("finished", job, None)))
+        else:
+            job.future = self.thread_pool.submit(self.run_thread_job, job, function, args)
+
+        self.notify()
+        return job
+
+    def run_thread_job(self, job, function, args): # Runs on a worker thread
+
+        if job.cancel_event.is_set():
+            self.events.put(("cancelled", job, None))
+            return
+
+        self.events.put(("running", job, None))
+
+        try:
+            with metrics.profile(job.name):
+                result = function(job, *args)
+        except JobCancelled:
+            self.events.put(("cancelled", job, None))
+        except Exception as e:
+            self.events.put(("failed", job, e))
+        else:
+            self.events.put(("cancelled" if job.cancel_event.is_set() else "done", job, result))
+
+    def cancel(self, job): # Running thread jobs stop at their next progress report, queued jobs never start, running process jobs cant be stopped
+
+        job.cancel_event.set()
+
+        # A thread job that never started wont report anything itself, process jobs still go through their done callback
+        if job.future.cancel() and not job.use_process:
+            self.events.put(("cancelled", job, None))
+
+    def poll(self): # Runs on the Tk thread, applies everything the workers reported since the last poll
+
+        try:
+            self.root.after(self.poll_interval, self.poll) # Scheduling the next poll first so a failing callback cant stop the loop
+        except tk.TclError:
+            return # The root was destroyed
+
+        changed = False
+
+        for _ in range(self.max_events_per_poll):
+            try:
+                kind, job, value = self.events.get_nowait()
+            except queue.Empty:
+                break
+
+            changed = True
+
+            if job.status in ("done", "failed", "cancelled"):
+                continue # Late reports for a job that is already over
+
+            if kind == "progress":
+                job.progress = value
+            elif kind == "running":
+                job.status = "running"
+            elif kind == "finished": # Process jobs only report once they are over
+                if job.future.cancelled():
+                    self.finish(job, "cancelled", None)
+                elif job.future.exception() is not None:
+                    self.finish(job, "failed", job.future.exception())
+                else:
+                    self.finish(job, "done", job.future.result())
+            else:
+                self.finish(job, kind, value)
+
+        for job in list(self.jobs.values()):
+            if job.status == "queued" and job.future.running(): # Process jobs dont report when they start
+                job.status = "running"
+                changed = True
+
+            if job.finished_at is not None and time.time() - job.finished_at > self.finished_display_time:
+                del self.jobs[job.id]
+                changed = True
+
+        if changed:
+            self.notify()
+
+    def finish(self, job, status, value):
+
+        job.status = status
+        job.finished_at = time.time()
+
+        if status == "done":
+            job.result = value
+            job.progress = 1.0
+        elif status == "failed":
+            job.error = value
+
+        if job.on_done is not None:
+            try:
+                job.on_done(job)
+            except Exception as e:
+                print(f"Error in the callback of {job.name}: {e}")
+
+    def notify(self):
+        if self.on_change is not None:
+            self.on_change()
+
+    def shutdown(self): # Cancels everything that is left, used when the app is closed
+
+        for job in self.jobs.values():
+            job.cancel_event.set()
+
+        self.thread_pool.shutdown(wait=False, cancel_futures=True)
+
+        if self.process_pool is not None:
+            self.process_pool.shutdown(wait=False, cancel_futures=True)
+
+class App:
+
+    def __init__(self, measure_startup=False):
+
+        # The one root the whole app lives in, screens are swapped inside it instead of making a new window each time
+        self.root = tk.Tk()
+        self.root.config(bg="black")
+        self.root.resizable(False, False) # Makes the window not resizable
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
+
+        self.screen = None # The frame holding the current screen
+        self.images = {} # Decoded and resized images, keyed by (name, size)
+
+        self.welc_window = None
+        self.conv_window = None
+        self.yt_window = None
+
+        self.scheduler = JobScheduler() # Runs the conversions and downloads in the background
+        self.scheduler.on_change = self.refresh_jobs
+        self.scheduler.attach(self.root)
+
+        # The jobs list sits at the bottom of every screen
+        self.jobs_frame = tk.Frame(self.root, bg="#0d0d0d")
+        self.job_labels = {}
+        self.jobs_shown = None
+
+        self.welcome_window() # Creates the welcome window when the app is first opened
+
+        if measure_startup:
+            self.report_startup()
+            return
+
+        self.root.after(500, lambda: threading.Thread(target=warm_imports, daemon=True).start()) # Warming up the heavy imports once the window is showing
+
+        self.root.mainloop()
+
+    def report_startup(self): # Draws the first window, prints how long it took and closes the app
+
+        self.root.update() # Forces the first paint
+        elapsed = time.perf_counter() - startup_time
+
+        loaded = [module for module in heavy_modules if module in sys.modules] # These should only be loaded later on
+        print(f"Time to first window: {elapsed * 1000:.0f} ms")
+        print(f"Heavy modules loaded before the first window: {', '.join(loaded) if loaded else 'none'}")
+
+        self.close()
+    
+    def welcome_window(self):  
+
+        if self.welc_window is None: # Checking if the window class already exists
+            self.welc_window = WelcomeWindow() # Creating the welcome window
+
+        self.welc_window.load_ui(self)
+
+    def convertion_window(self):
+
+        if self.conv_window is None: # Checking if the window class already exists
+            self.conv_window = ConversionWindow() # Creating the welcome window
+
+        self.conv_window.load_ui(self)
+
+    def youtube_window(self):   
+
+        if self.yt_window is None: # Checking if the window class already exists
+            self.yt_window = YoutubeWindow() # Creating the youtube window
+
+        self.yt_window.load_ui(self)
+
+    def get_img(self, name, sizeDimensions): # Returns the image object at its usable form
+
+        key = (name, tuple(sizeDimensions))
+
+        if key not in self.images: # Each image is only read and resized the first time it is needed
+            image_path = os.path.join(os.path.join(os.path.dirname(__file__), "assets"), name)  
+
+            with Image.open(image_path) as img:
+                img = img.resize(sizeDimensions, Image.LANCZOS)  # Resize image to fit window
+
+            self.images[key] = ImageTk.PhotoImage(img)
+
+        return self.images[key]
+
+    def new_screen(self, title, geometry="800x600"): # Replaces the current screen with an empty one and returns the frame to build it in
+
+        if self.screen is not None:
+            self.screen.destroy()
+
+        # Core window settings
+        self.root.geometry(geometry)
+        self.root.title(title)
+
+        self.screen = tk.Frame(self.root, bg="black")
+        self.screen.place(x=0, y=0, relwidth=1, relheight=1)
+
+        # These 4 lines turn the background into an image
+        bg_img = self.get_img("background.jpg", (800,600)) 
+        background_label = tk.Label(self.screen, image=bg_img)
+        background_label.img = bg_img
+        background_label.place(x=0, y=0, relwidth=1, relheight=1)
+
+        self.jobs_frame.lift() # Keeping the jobs list on top of the new screen
+
+        return self.screen
+
+    def refresh_jobs(self): # Redraws the list of background jobs, only rebuilding the rows when a job is added, finished or removed
+
+        try:
+            if not self.jobs_frame.winfo_exists():
+                return
+        except tk.TclError:
+            return # The root was destroyed
+
+        jobs = list(self.scheduler.jobs.values())[-5:] # Only the 5 newest jobs fit on screen
+        shown = [(job.id, job.status) for job in jobs]
+
+        if shown != self.jobs_shown:
+            self.jobs_shown = shown
+            self.job_labels = {}
+
+            for child in self.jobs_frame.winfo_children():
+                child.destroy()
+
+            if not jobs:
+                self.jobs_frame.place_forget()
+                return
+
+            for job in jobs:
+                row = tk.Frame(self.jobs_frame, bg="#0d0d0d")
+                row.pack(fill='x')
+
+                label = tk.Label(row, font=('Arial', 12), bg="#0d0d0d", fg="white", anchor="w")
+                label.pack(side=tk.LEFT, padx=10)
+                self.job_labels[job.id] = label
+
+                if job.can_cancel(): # Running image conversions finish anyway, so they get no button
+                    cancel_button = tk.Button(row, text="Cancel", font=('Arial', 10), bg="#a3051a", fg="white", command=lambda job=job: self.scheduler.cancel(job))
+                    cancel_button.pack(side=tk.RIGHT, padx=10)
+
+            self.jobs_frame.place(relx=0, rely=1, relwidth=1, anchor="sw")
+            self.jobs_frame.lift()
+
+        for job in jobs: # Only the text changes while jobs are running
+            progress = f" {job.progress:.0%}" if job.status == "running" and job.progress is not None else ""
+            self.job_labels[job.id].config(text=f"{job.name}: {job.status}{progress}")
+
+    def close(self): # Stops the background jobs together with the window
+        self.scheduler.shutdown()
+        self.root.destroy()
+
+class WelcomeWindow:
+
+    def load_ui(self, app):
+
+        self.app = app
+        self.root = app.root
+
+        screen = app.new_screen("NT file tools") # Swapping out the previous screen
+
+        main_frame = tk.Frame(screen, bg="#0d0d0d") # Everything resides in this frame in order to be centred
+        main_frame.pack(expand=True)
+
+        title = tk.Label(main_frame, text="Welcome to NT file tools!", font=('Arial', 25), bg="#0d0d0d", fg="white")
+        title.pack()
+
+        options_label = tk.Label(main_frame, text="Please choose one of the following functions.", font=('Arial', 18), bg="#0d0d0d", fg="white")
+        options_label.pack(pady=30)
+
+        buttons_frame = tk.Frame(main_frame, bg="#0d0d0d")
+        buttons_frame.pack(pady=10)
+
+        converter_button = tk.Button(buttons_frame, text="Converter", font=('Arial', 18), bg="#0b21e3", fg="white", command=app.convertion_window)
+        converter_button.pack(side=tk.LEFT, padx=10)
+
+        yt_button = tk.Button(buttons_frame, text="Youtube", font=('Arial', 18), bg="#e30b0b", fg="white", command=app.youtube_window)
+        yt_button.pack(side=tk.LEFT, padx=10)
+
+class ConversionWindow:
+
+    def __init__(self):
+        self.file_converter = FileConverter() # Setting up the file converter class
+        self.previewer = VideoPreviewer()
+
+    def load_ui(self, app): # The ui that opens when the window is first loaded
+
+        self.app = app
+        self.root = app.root
+
+        screen = app.new_screen("NT youtube downloader") # Swapping out the previous screen
+
+        main_frame = tk.Frame(screen, bg="#292929")
+        main_frame.pack(expand=True)
+
+        self.title_label = tk.Label(main_frame, text="Please select a file to convert", font=('Arial', 22), bg="#292929", fg="white", wraplength=700)
+        self.title_label.pack(pady=10)
+
+        self.preview_label = tk.Label(main_frame, bg="#292929") # Shows a frame of the selected video
+        self.preview_label.pack()
+
+        buttons_frame = tk.Frame(main_frame, bg="#292929")
+        buttons_frame.pack(pady=20)
+
+        self.selection_button = tk.Button(buttons_frame, text="Select", font=('Arial', 22), bg="#0b21e3", fg="white", command=self.select_file)
+        self.selection_button.pack(side=tk.LEFT, padx=10)
+
+        self.decline_button = tk.Button(buttons_frame, text="Cancel", font=('Arial', 22), bg="#a3051a", fg="white", command=self.app.welcome_window)
+        self.decline_button.pack(side=tk.LEFT ,padx=10)
+
+    def select_file(self): # Selects which file the user wants to convert
+        
+        file_path = filedialog.askopenfilename(
+            title="Please select a file to convert",  
+            filetypes=self.file_converter.supported_files
+        )
+
+        if file_path: # Checking if the user selected a file
+            
+            file_name_with_extension = os.path.basename(file_path) # Gets the name of the file but with the extension too
+            file_name, file_extension = os.path.splitext(file_name_with_extension) # Seperates the extension from the name of the file
+
+            self.title_label.config(text=f"Please select into which file type you want to convert {file_name_with_extension}.")
+            self.selection_button.config(text="Confirm", bg="#0a7806", command=lambda: self.select_type(file_path, file_name, file_extension))
+            self.decline_button.config(command=lambda: self.load_ui(self.app))
+
+            if get_file_kind(file_path) == "video":
+                screen = self.title_label # Used to check that the user is still on this screen once the preview is ready
+                self.app.scheduler.submit("Loading preview", self.load_preview, file_path, on_done=lambda job: self.show_preview(job, screen))
+
+    def load_preview(self, job, file_path): # Runs on a worker thread, the PhotoImage itself can only be made on the Tk thread
+        return self.previewer.poster(file_path, 320)
+
+    def show_preview(self, job, screen): # Runs on the Tk thread once the preview is loaded
+
+        if screen is not self.title_label or job.status != "done":
+            return # The user already left this screen or the video couldnt be read
+
+        try:
+            preview_img = ImageTk.PhotoImage(job.result)
+            self.preview_label.config(image=preview_img)
+            self.preview_label.img = preview_img # Keeping a reference so Tk doesnt lose the image
+        except tk.TclError:
+            return # The window was closed
+
+    def select_type(self, file_path, file_name, file_extension): # Selects in what type the user wants to convert the file
+        
+        isImage = None # This will help us know what file type we have later on
+        title_text = None # This will be set to the text of the grid header later on
+        file_types = None # The list of the file types that will later be looped through
+
+        # Get the list of supported file types for images and videos
+        image_file_types = self.file_converter.supported_files[1][1].split()
+        video_file_types = self.file_converter.supported_files[2][1].split()
+        file_ext_trans = "*" + file_extension # Adding a * to the start of the extension so that it is the same type as the ones in the lists
+
+        if (file_ext_trans) in image_file_types: # Checking if the file type is an image
+
+            file_types = image_file_types
+            file_types.remove(file_ext_trans)
+
+            if file_ext_trans != "*.jpg": # checking if it hasnt already been removed
+                file_types.remove("*.jpg") # Removing jpg as jpeg already exists
+            else:
+                file_types.remove("*.jpeg") # Removing jpeg since file is a jpg
+
+            isImage = True
+            title_text = "Image types"
+        elif (file_ext_trans) in video_file_types: # Checking if the file type is a video
+
+            file_types = video_file_types
+            file_types.remove(file_ext_trans)
+            isImage = False 
+            title_text = "Video types"
+        else: # The program has failed
+
+            self.app.welcome_window() # Going back to the homepage
+            return None
+
+        screen = self.app.new_screen("NT youtube downloader", "600x600") # Swapping out the previous screen
+
+        main_frame = tk.Frame(screen, bg="#292929")
+        main_frame.pack(expand=True)
+
+        header_label = tk.Label(main_frame, text=title_text, font=('Arial', 18, 'bold'), bg="#292929", fg="white")
+        header_label.grid(row=0, column=1, padx=10, pady=5, sticky="ew")
+
+        for i,file_type in enumerate(file_types):
+
+            file_button = tk.Button(main_frame, text=file_type, font=('Arial', 18, 'bold'), bg="#4c4d4c", fg="white", command=lambda file_type=file_type:self.convert_ui(file_path, file_name, file_extension, file_type, isImage))
+            file_button.grid(row=(i + 1), column=1, padx=10, pady=5, sticky="ew")
+
+    def convert_ui(self, file_path, file_name, file_type_old, file_type_new, IsImage): # The ui that has the user confirm what file he wants to convert and in which type
+
+        screen = self.app.new_screen("NT youtube downloader") # Swapping out the previous screen
+
+        main_frame = tk.Frame(screen, bg="#292929")
+        main_frame.pack(expand=True)
+
+        title_text = f'Are you sure you want to convert the {file_name+file_type_old} into a {file_type_new}?'
+        title_label = tk.Label(main_frame, text=title_text, font=('Arial', 22), bg="#4c4d4c", fg="white", wraplength=700)
+        title_label.pack(pady=10)
+
+        buttons_frame = tk.Frame(main_frame, bg="#292929") # This frame will contain the Yes and No buttons
+        buttons_frame.pack(pady=20)
+
+        accept_button = tk.Button(buttons_frame, text="Yes", font=('Arial', 22), bg="#048526", fg="white", command=lambda: self.start_conversion(file_path, file_type_new, IsImage))
+        accept_button.pack(side=tk.LEFT, padx=10)
+
+        decline_button = tk.Button(buttons_frame, text="No", font=('Arial', 22), bg="#a3051a", fg="white", command=self.app.welcome_window)
+        decline_button.pack(side=tk.LEFT, padx=10)
+
+    def start_conversion(self, file_path, file_type_new, IsImage): # Hands the conversion to the job scheduler and goes straight back to the homepage
+
+        job_name = f"{os.path.basename(file_path)} to {file_type_new}"
+
+        # Deciding which convert method to use based on if the file is an image or not
+        if IsImage == True:
+            self.app.scheduler.submit(job_name, save_image_as, file_path, get_image_type(file_type_new), use_process=True, on_done=self.conversion_done)
+        else:
+            self.app.scheduler.submit(job_name, self.run_video_conversion, file_path, file_type_new, on_done=self.conversion_done)
+
+        self.app.welcome_window()
+
+    def run_video_conversion(self, job, file_path, file_type_new): # Runs on a worker thread
+
+        method = self.file_converter.convert_video(file_path, file_type_new, progress=job.set_progress)
+
+        if method is None:
+            raise RuntimeError(f"Could not convert {file_path}")
+
+        return method
+
+    def conversion_done(self, job): # Runs on the Tk thread once the conversion is over
+
+        if job.status == "done":
+            print(f"Finished converting {job.name}")
+        elif job.status == "failed":
+            print(f"Converting {job.name} failed: {job.error}")
+
+class YoutubeWindow:
+
+    def __init__(self):
+        self.yt_dl = YoutubeDownloader() # Setting up the youtube downloader class
+
+    def load_ui(self, app):
+
+        self.app = app
+        self.root = app.root
+
+        screen = app.new_screen("NT youtube downloader") # Swapping out the previous screen
+
+        self.main_frame = tk.Frame(screen, bg='#0d0d0d') # Everything will be stored in here
+        self.main_frame.pack(expand=True, fill='x')
+
+        self.title = tk.Label(self.main_frame, text="Please enter your link below", font=('Arial', 22), bg="#292929", fg="white")
+        self.title.pack()
+
+        video_img = app.get_img("vid_placeholder.jpg", (414, 232)) 
+        self.video_label = tk.Label(self.main_frame, width=320, height=180, image=video_img) # this will show the youtube video image placeholder
+        self.video_label.img = video_img
+        self.video_label.pack(pady=10)
+
+        self.video_entry = tk.Entry(self.main_frame, font=('Arial', 22), width=700, justify='center', bg="#171717", fg="white")
+        self.video_entry.pack(pady=10)
+
+        self.buttons_frame = tk.Frame(self.main_frame, bg="#0d0d0d") # This frame will contain the confirm/download and cancel button
+        self.buttons_frame.pack(pady=10)
+
+        self.confirm_button = tk.Button(self.buttons_frame, text="Confirm", font=('Arial', 22), bg="#026302", fg="white", command=self.onConfirm)
+        self.confirm_button.pack(side=tk.LEFT, padx=10)
+
+        self.cancel_button = tk.Button(self.buttons_frame, text="Exit", font=('Arial', 22), bg="#c9040e", fg="white", command=app.welcome_window)
+        self.cancel_button.pack(side=tk.LEFT, padx=10) # Making the cancel button visible
+
+    def download(self, yt_dl, yt_link): # Runs when the user clicks the download button
+
+        download_dir = filedialog.askdirectory(title="Select Download Directory")
+
+        if not download_dir:
+            print("Download failed.")
+            self.load_ui(self.app)  # Restart the app
+            return
+
+        default_filename = 'video'
+        filename = simpledialog.askstring("Input", "Enter filename (without extension):", initialvalue=default_filename)
+
+        if filename is None:
+            filename = default_filename
+
+        self.app.scheduler.submit(f"Downloading {filename}", self.run_download, yt_dl, yt_link, download_dir, filename, on_done=self.download_done)
+        self.app.youtube_window() #resetting the window so another link can be entered
+
+    def run_download(self, job, yt_dl, yt_link, download_dir, filename): # Runs on a worker thread
+
+        if yt_dl.download_vid(yt_link, download_dir, filename, progress=job.set_progress) is not True:
+            raise RuntimeError("Download failed.")
+
+    def download_done(self, job): # Runs on the Tk thread once the download is over
+
+        if job.status == "done":
+            print("Download finished successfully.")
+        elif job.status == "failed":
+            print(f"Download failed: {job.error}")
+
+    def onConfirm(self): # Runs when the user enters a link and presses confirm    
+
+        yt_link = self.video_entry.get()
+        print(yt_link)
+
+        self.confirm_button.config(state=tk.DISABLED) # Stops the same link from being looked up twice
+        self.title.config(text="Loading video...")
+
+        screen = self.title # Used to check that the user is still on this screen once the preview is ready
+        self.app.scheduler.submit("Loading preview", self.load_preview, yt_link, on_done=lambda job: self.show_preview(job, yt_link, screen))
+
+    def load_preview(self, job, yt_link): # Runs on a worker thread, the PhotoImage itself can only be made on the Tk thread
+
+        video = self.yt_dl.get_vid(yt_link)
+
+        if video is None:
+            return None
+
+        video_title, thumbnail_url = video
+
+        if video_title is None or not thumbnail_url: #checks if the link is valid
+            return None
+
+        job.check_cancelled()
+
+        thumbnail = self.yt_dl.download_thumbnail(thumbnail_url, (320, 180))
+
+        return video_title, thumbnail
+
+    def show_preview(self, job, yt_link, screen): # Runs on the Tk thread once the preview is loaded
+
+        if screen is not self.title:
+            return # The user already left this screen
+
+        try:
+            self.confirm_button.config(state=tk.NORMAL)
+        except tk.TclError:
+            return # The window was closed
+
+        if job.status != "done" or job.result is None:
+            self.title.config(text="Please enter your link below")
+            return
+
+        video_title, thumbnail = job.result
+        thumbnail_img = ImageTk.PhotoImage(thumbnail)
+
+        self.video_label.config(image=thumbnail_img) # Assigning the thumbnail image to the placeholder
+        self.video_label.img = thumbnail_img
+
+        self.title.config(text=video_title) 
+        self.confirm_button.config(text="Download", bg="#0310a1", command=lambda: self.download(self.yt_dl, yt_link))
+        self.cancel_button.config(text="Cancel", command=lambda: self.load_ui(self.app))
+
+def get_file_kind(file_path): # Returns "image", "video" or None based on the extension
+
+    extension = "*" + os.path.splitext(file_path)[1].lower()
+
+    if extension in FileConverter.supported_files[1][1].split():
+        return "image"
+    if extension in FileConverter.supported_files[2][1].split():
+        return "video"
+    return None
+
+def convert_files(paths, new_type, workers=None, video_workers=1, allow_remux=True, parallel_video=False, segment_seconds=60, memory_limit=None, frames="auto",
+                  manifest=None):
+    # Converts images and videos without any ui and returns one result dict per file, with a manifest unchanged files are skipped
+
+    converter = FileConverter(manifest)
+    target_kind = get_file_kind("file." + new_type.split(".")[-1])
+    results = []
+
+    images = []
+    videos = []
+
+    for file_path in paths:
+        kind = get_file_kind(file_path)
+
+        if kind is None or kind != target_kind: # Images can only become images and videos only videos
+            results.append({'action': 'convert', 'source': file_path, 'output': None, 'status': 'failed',
+                            'error': f"Cannot convert {file_path} to {new_type}", 'seconds': 0.0})
+        elif kind == "image":
+            images.append(file_path)
+        else:
+            videos.append(file_path)
+
+    if images:
+        image_results, report = converter.convert_images(images, new_type, workers=workers, memory_limit=memory_limit, frames=frames)
+
+        for result in image_results:
+            results.append({'action': 'convert', 'source': result['source'], 'output': result['output'],
+                            'status': 'failed' if result['error'] else 'skipped' if result.get('skipped') else 'done',
+                            'error': result['error'], 'seconds': result['seconds']})
+
+    def convert_one_video(file_path):
+
+        start_time = time.perf_counter()
+        result = {'action': 'convert', 'source': file_path, 'output': None, 'status': 'done', 'error': None}
+
+        try:
+            with metrics.profile(os.path.basename(file_path)):
+                result['output'], result['method'] = converter.save_video_as(file_path, new_type, allow_remux, parallel_video, workers, segment_seconds)
+
+            if result['method'].startswith("skipped"):
+                result['status'] = 'skipped'
+        except Exception as e:
+            result['status'] = 'failed'
+            result['error'] = f"{type(e).__name__}: {e}"
+            metrics.failure("video_job", e)
+
+        result['seconds'] = time.perf_counter() - start_time
+        return result
+
+    # Every video already keeps ffmpeg busy on several cores, so only a few run side by side
+    with ThreadPoolExecutor(max_workers=max(1, video_workers)) as executor:
+        results.extend(executor.map(convert_one_video, videos))
+
+    if manifest is not None:
+        manifest.save()
+
+    return results
+
+def download_links(links, download_dir, workers=4, max_per_host=2, retry_failed=False, new_type=None):
+    # Downloads links and playlists without any ui and returns one result dict per video, new_type converts them while they download
+
+    manager = DownloadManager(download_dir, max_workers=workers, max_per_host=max_per_host, new_type=new_type)
+    items = manager.add(links)
+    report = manager.run(retry_failed=retry_failed)
+
+    results = [] # Only the videos of these links, the state file also remembers the ones of earlier runs
+    for item in items:
+        results.append({'action': 'download', 'source': item['url'], 'output': item['filepath'], 'status': item['status'],
+                        'error': item['error'], 'bytes': item['downloaded_bytes']})
+
+    return results, report
+
+def read_manifest(manifest_path): # Reads a .json or .csv manifest into a list of rows with action, source, to and dir
+
+    if manifest_path.lower().endswith(".csv"):
+        with open(manifest_path, newline="") as f:
+            return [dict(row) for row in csv.DictReader(f)]
+
+    with open(manifest_path) as f:
+        rows = json.load(f)
+
+    if isinstance(rows, dict): # {"jobs": [...]} is accepted as well as a plain list
+        rows = rows.get("jobs", [])
+
+    return rows
+
+def run_manifest(manifest_path, workers=None, video_workers=1, download_workers=4, max_per_host=2, allow_remux=True, parallel_video=False, memory_limit=None, frames="auto",
+                 conversion_manifest=None):
+    # Runs every row of a manifest, conversions are grouped by target type and downloads by folder so each group runs in parallel
+
+    conversions = OrderedDict() # target type -> paths
+    downloads = OrderedDict() # (folder, type to convert to or None) -> links
+    results = []
+
+    for row in read_manifest(manifest_path):
+        action = (row.get("action") or "").strip().lower()
+
+        if action == "convert" and row.get("source") and row.get("to"):
+            conversions.setdefault(row["to"], []).append(row["source"])
+        elif action == "download" and row.get("source"):
+            downloads.setdefault((row.get("dir") or ".", row.get("to") or None), []).append(row["source"])
+        else:
+            results.append({'action': action, 'source': row.get("source"), 'output': None, 'status': 'failed', 'error': f"Invalid manifest row: {row}"})
+
+    for new_type, paths in conversions.items():
+        results.extend(convert_files(paths, new_type, workers, video_workers, allow_remux, parallel_video,
+                                     memory_limit=memory_limit, frames=frames, manifest=conversion_manifest))
+
+    for (download_dir, new_type), links in downloads.items():
+        download_results, report = download_links(links, download_dir, download_workers, max_per_host, new_type=new_type)
+        results.extend(download_results)
+
+    return results
+
+def list_files(folders): # Every file in the folders, hidden files and folders (temporary files, state files) are left out
+
+    for folder in folders:
+        for root, dirs, files in os.walk(folder):
+            dirs[:] = [name for name in dirs if not name.startswith(".")]
+
+            for name in files:
+                if not name.startswith("."):
+                    yield os.path.join(root, name)
+
+class InotifyWatcher: # Reports files being written in folders through Linux inotify, so huge folders never have to be rescanned
+
+    IN_MODIFY = 0x2
+    IN_CLOSE_WRITE = 0x8
+    IN_MOVED_TO = 0x80
+    IN_CREATE = 0x100
+    IN_Q_OVERFLOW = 0x4000
+    IN_IGNORED = 0x8000
+    IN_ISDIR = 0x40000000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+
+    def __init__(self, folders):
+        import ctypes
+        import ctypes.util
+
+        self.ctypes = ctypes
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self.libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "Could not start inotify")
+
+        self.folders = {} # watch descriptor -> folder
+
+        for folder in folders:
+            self.add_folder(folder)
+
+    def add_folder(self, folder): # Watches the folder and the folders inside it, returns the files that are already there
+
+        found = []
+        mask = self.IN_MODIFY | self.IN_CLOSE_WRITE | self.IN_MOVED_TO | self.IN_CREATE
+
+        for root, dirs, files in os.walk(folder):
+            dirs[:] = [name for name in dirs if not name.startswith(".")] # Hidden folders hold temporary files, like the video segments
+
+            watch = self.libc.inotify_add_watch(self.fd, os.fsencode(root), mask)
+            if watch < 0:
+                raise OSError(self.ctypes.get_errno(), f"Could not watch {root}")
+
+            self.folders[watch] = root
+            found.extend(os.path.join(root, name) for name in files if not name.startswith("."))
+
+        return found
+
+    def read(self, timeout): # Waits up to timeout seconds and returns [(path, event)], event is "written", "closed" or "rescan"
+
+        readable, writable, failed = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        events = []
+        position = 0
+
+        while position < len(data):
+            watch, mask, cookie, length = struct.unpack_from("iIII", data, position)
+            name = os.fsdecode(data[position + 16:position + 16 + length].rstrip(b"\0"))
+            position += 16 + length
+
+            if mask & self.IN_Q_OVERFLOW: # The kernel dropped events, only a scan can tell what was missed
+                events.append((None, "rescan"))
+                continue
+
+            if mask & self.IN_IGNORED: # The folder was deleted
+                self.folders.pop(watch, None)
+                continue
+
+            folder = self.folders.get(watch)
+            if folder is None or name.startswith("."):
+                continue
+
+            path = os.path.join(folder, name)
+
+            if mask & self.IN_ISDIR:
+                if mask & (self.IN_CREATE | self.IN_MOVED_TO): # Files can land in a new folder before its watch is added
+                    events.extend((file_path, "written") for file_path in self.add_folder(path))
+                continue
+
+            events.append((path, "closed" if mask & (self.IN_CLOSE_WRITE | self.IN_MOVED_TO) else "written"))
+
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+class PollingWatcher: # For systems without inotify, compares the sizes and mtimes in the folders every few seconds
+
+    def __init__(self, folders, interval=2.0):
+        self.folders = folders
+        self.interval = interval
+        self.next_scan = time.monotonic() + interval
+        self.known = self.scan() # Files that are already there are not reported
+
+    def scan(self):
+
+        found = {}
+
+        for file_path in list_files(self.folders):
+            try:
+                stat = os.stat(file_path)
+            except OSError: # Deleted in the meantime
+                continue
+
+            found[file_path] = (stat.st_size, stat.st_mtime_ns)
+
+        return found
+
+    def read(self, timeout):
+
+        wait_time = self.next_scan - time.monotonic()
+
+        if wait_time > timeout:
+            time.sleep(timeout)
+            return []
+
+        time.sleep(max(0.0, wait_time))
+        self.next_scan = time.monotonic() + self.interval
+
+        current = self.scan()
+        events = [(file_path, "written") for file_path, stat in current.items() if self.known.get(file_path) != stat]
+        self.known = current
+
+        return events
+
+    def close(self):
+        pass
+
+def ignore_interrupts(): # Pool initializer, Ctrl+C and SIGTERM are handled by the daemon which then shuts the workers down cleanly
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+
+def make_watcher(folders): # inotify when the system has it, polling otherwise
+
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(folders)
+        except (OSError, AttributeError) as e: # No libc inotify or the watch limit was reached
+            print(f"inotify is not available ({e}), checking the folders every few seconds instead")
+
+    return PollingWatcher(folders)
+
+class WatchDaemon: # Converts files dropped into watched folders as soon as they are completely written
+
+    settle_after_close = 0.2 # A file that was just closed or moved in is usually complete, this only catches tools that reopen it
+
+    def __init__(self, folders, targets, state_path=None, workers=2, video_workers=1, max_in_flight=None, debounce=2.0, max_attempts=5,
+                 retry_delay=5.0, manifest=None, allow_remux=True, parallel_video=False, segment_seconds=60, memory_limit=None, frames="auto"):
+
+        self.folders = [os.path.abspath(folder) for folder in folders]
+        self.targets = targets # "image" / "video" -> new type, files of other kinds are left alone
+        self.state_path = state_path or os.path.join(self.folders[0], ".nt_watch.json")
+        self.workers = workers
+        self.video_workers = video_workers
+        self.max_in_flight = max_in_flight or (workers + video_workers) * 2 # Past this ready files wait in the queue instead of piling up in the pools
+        self.debounce = debounce # Seconds without a write before a file that was not closed yet counts as complete
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay # Doubled after every failed attempt
+        self.converter = FileConverter(manifest) # With a manifest, files that were converted before a restart are skipped
+        self.video_options = (allow_remux, parallel_video, None, segment_seconds)
+        self.memory_limit = memory_limit
+        self.frames = frames
+
+        self.settling = {} # path -> (time of the last event, closed), files that might still be written
+        self.first_seen = {} # path -> time of the first event, for the latency metric
+        self.queue = [] # Paths that are ready to convert, kept in the state file together with the ones in flight
+        self.retries = {} # path -> {'attempts', 'next_try' (unix time, None once queued again), 'error'}
+        self.failed = {} # path -> error, for files that failed max_attempts times
+        self.in_flight = {} # future -> path
+        self.finished = queue.Queue() # The pools hand finished futures back to the loop through here
+        self.stop_event = threading.Event()
+        self.started_at = time.time()
+        self.session_failures = []
+        self.unsaved = False
+
+        self.load_state()
+
+    def load_state(self): # Picks up the queue and the retries from an earlier run
+
+        try:
+            with open(self.state_path) as f:
+                state = json.load(f)
+
+            self.queue = state['queue']
+            self.retries = state['retries']
+            self.failed = state['failed']
+        except (OSError, ValueError, KeyError):
+            return
+
+        for path, retry in self.retries.items():
+            if retry['next_try'] is None and path not in self.queue: # Was queued again when the daemon stopped
+                self.queue.append(path)
+
+    def save_state(self):
+
+        state = {'queue': self.queue + list(self.in_flight.values()), 'retries': self.retries, 'failed': self.failed}
+        write_file_atomic(self.state_path, json.dumps(state))
+        self.unsaved = False
+
+    def target_for(self, file_path): # The new type for the file, or None when the daemon should leave it alone
+
+        if os.path.basename(file_path).startswith("."):
+            return None
+
+        new_type = self.targets.get(get_file_kind(file_path))
+
+        # Files that already have the new type are skipped, this includes everything the daemon writes itself
+        if new_type is None or has_type(file_path, new_type):
+            return None
+
+        return new_type
+
+    def note(self, file_path, event): # Called for every event, the file is converted once it has been quiet long enough
+
+        if self.target_for(file_path) is None:
+            return
+
+        # A write means new contents (like a fixed file under the same name), so earlier failures dont count anymore
+        if self.failed.pop(file_path, None) is not None or self.retries.pop(file_path, None) is not None:
+            self.unsaved = True
+
+            if file_path in self.session_failures:
+                self.session_failures.remove(file_path)
+
+        if file_path in self.queue: # Written again before it was picked up
+            self.queue.remove(file_path)
+
+        self.first_seen.setdefault(file_path, time.monotonic())
+        self.settling[file_path] = (time.monotonic(), event == "closed")
+
+    def queue_ready(self):
+
+        now = time.monotonic()
+
+        for file_path, (last_event, closed) in list(self.settling.items()):
+            if now - last_event >= (self.settle_after_close if closed else self.debounce):
+                del self.settling[file_path]
+
+                if os.path.isfile(file_path) and file_path not in self.queue and file_path not in self.in_flight.values():
+                    self.queue.append(file_path)
+                    self.unsaved = True
+
+        for file_path, retry in self.retries.items():
+            if retry['next_try'] is not None and retry['next_try'] <= time.time():
+                retry['next_try'] = None
+                self.unsaved = True
+
+                if file_path not in self.queue and file_path not in self.in_flight.values(): # Written again meanwhile and already on its way
+                    self.queue.append(file_path)
+
+    def submit(self, image_pool, video_pool): # Starts conversions until max_in_flight is reached, the rest waits in the queue
+
+        while self.queue and len(self.in_flight) < self.max_in_flight:
+            file_path = self.queue.pop(0)
+            new_type = self.target_for(file_path)
+
+            if new_type is None or not os.path.exists(file_path): # Deleted or renamed while it was waiting
+                self.retries.pop(file_path, None)
+                self.first_seen.pop(file_path, None)
+                continue
+
+            if get_file_kind(file_path) == "image":
+                manifest = self.converter.manifest
+                desired_type = get_image_type(new_type)
+
+                if manifest is not None and manifest.up_to_date(file_path, desired_type, {'frames': self.frames}) is not None:
+                    self.first_seen.pop(file_path, None)
+                    continue
+
+                future = image_pool.submit(batch_convert_worker, file_path, desired_type, metrics.profile_dir, metrics.events_path,
+                                           self.memory_limit, self.frames, manifest is not None)
+            else:
+                future = video_pool.submit(self.convert_video, file_path, new_type)
+
+            self.in_flight[future] = file_path
+            future.add_done_callback(self.finished.put)
+
+    def convert_video(self, file_path, new_type): # Runs in the video pool
+
+        start_time = time.perf_counter()
+        output, method = self.converter.save_video_as(file_path, new_type, *self.video_options)
+
+        return {'source': file_path, 'output': output, 'error': None, 'method': method, 'seconds': time.perf_counter() - start_time}
+
+    def collect_finished(self):
+
+        while True:
+            try:
+                future = self.finished.get_nowait()
+            except queue.Empty:
+                break
+
+            file_path = self.in_flight.pop(future)
+            kind = get_file_kind(file_path)
+            self.unsaved = True
+
+            if future.cancelled(): # Stopped before it started, stays queued for the next run
+                self.queue.insert(0, file_path)
+                continue
+
+            try:
+                result = future.result()
+            except Exception as e: # Only video conversions raise, image workers count their failures themselves
+                result = {'source': file_path, 'output': None, 'error': f"{type(e).__name__}: {e}"}
+                metrics.failure("video_job", e)
+
+            if 'metrics' in result: # Image results come from another process
+                metrics.merge(result.pop('metrics'))
+
+            manifest = self.converter.manifest
+
+            if result['error'] is None and manifest is not None and kind == "image":
+                manifest.record(file_path, get_image_type(self.target_for(file_path)), {'frames': self.frames}, result['output'], result['signature'])
+                manifest.save()
+            elif result['error'] is None and manifest is not None:
+                manifest.save()
+
+            if result['error'] is None:
+                self.retries.pop(file_path, None)
+                metrics.count("watch_files_total", status="done", kind=kind)
+                metrics.record("watch_latency", time.monotonic() - self.first_seen.pop(file_path, time.monotonic()), {'kind': kind})
+                print(f"done: {file_path} -> {result['output']}")
+                continue
+
+            retry = self.retries.setdefault(file_path, {'attempts': 0, 'next_try': None, 'error': None})
+            retry['attempts'] += 1
+            retry['error'] = result['error']
+
+            if retry['attempts'] >= self.max_attempts:
+                del self.retries[file_path]
+                self.failed[file_path] = result['error']
+                self.first_seen.pop(file_path, None)
+                self.session_failures.append(file_path)
+                metrics.count("watch_files_total", status="failed", kind=kind)
+                print(f"failed: {file_path} -> {result['error']} (gave up after {retry['attempts']} attempts)")
+            else:
+                delay = self.retry_delay * 2 ** (retry['attempts'] - 1)
+                retry['next_try'] = time.time() + delay
+                metrics.count("watch_files_total", status="retry", kind=kind)
+                print(f"retry: {file_path} -> {result['error']} (trying again in {delay:g}s)")
+
+    def run(self, scan_existing=False, watcher=None): # Watches until stop() is called (or Ctrl+C / SIGTERM), the state is saved on the way out
+
+        # Service managers stop daemons with SIGTERM, which would otherwise end the process without the cleanup below
+        previous_handler = None
+        if threading.current_thread() is threading.main_thread():
+            previous_handler = signal.signal(signal.SIGTERM, lambda signum, frame: self.stop())
+
+        watcher = watcher or make_watcher(self.folders)
+        # spawn like the JobScheduler, forking here would copy the watcher, the video threads and their locks into every worker
+        image_pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"), initializer=ignore_interrupts)
+        video_pool = ThreadPoolExecutor(max_workers=self.video_workers)
+        last_save = 0.0
+
+        if scan_existing: # Catches files that arrived while the daemon was not running, the manifest skips the ones already done
+            for file_path in list_files(self.folders):
+                if self.target_for(file_path) is not None and file_path not in self.queue:
+                    self.queue.append(file_path)
+
+        print(f"Watching {', '.join(self.folders)} ({len(self.queue)} files queued)")
+
+        try:
+            while not self.stop_event.is_set():
+                # Short waits while anything is going on, so finished and settled files are picked up quickly
+                timeout = 0.05 if self.in_flight or self.settling or self.queue else 1.0
+
+                for file_path, event in watcher.read(timeout):
+                    if event == "rescan": # Events were lost, files changed since the start are checked again
+                        for changed_path in list_files(self.folders):
+                            if os.path.getmtime(changed_path) >= self.started_at:
+                                self.note(changed_path, "written")
+                    else:
+                        self.note(file_path, event)
+
+                self.collect_finished()
+                self.queue_ready()
+                self.submit(image_pool, video_pool)
+
+                if self.unsaved and time.monotonic() - last_save >= 1.0: # At most once a second, the queue can get long
+                    self.save_state()
+                    last_save = time.monotonic()
+        finally:
+            watcher.close()
+            image_pool.shutdown(cancel_futures=True)
+            video_pool.shutdown(cancel_futures=True)
+            self.collect_finished()
+            self.save_state()
+
+            if self.converter.manifest is not None:
+                self.converter.manifest.save()
+
+            if previous_handler is not None:
+                signal.signal(signal.SIGTERM, previous_handler)
+
+    def stop(self): # Can be called from any thread
+        self.stop_event.set()
+
+def positive_int(value): # argparse type for counts that have to be at least 1
+    number = int(value)
+
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"has to be at least 1, got {value}")
+
+    return number
+
+def build_parser():
+
+    parser = argparse.ArgumentParser(description="NT file tools, run without a command to open the app")
+    parser.add_argument("--startup-time", action="store_true", help="print how long the first window takes to show and exit")
+
+    # The output options work before and after the command, after it they are suppressed when not given so they dont undo the ones before
+    output_options = argparse.ArgumentParser(add_help=False)
+
+    for options, default in ((parser, None), (output_options, argparse.SUPPRESS)):
+        options.add_argument("--json", action="store_true", default=default or False, help="print the results as json, the progress messages go to stderr")
+        options.add_argument("--metrics", default=default, help="write the stage timings and counters to this file in the Prometheus text format")
+        options.add_argument("--metrics-jsonl", default=default, help="append every timed stage to this file as a json line")
+        options.add_argument("--profile-dir", default=default, help="save a cProfile dump of every job in this folder")
+
+    # Each group of options is only added to the commands that use it
+    image_options = argparse.ArgumentParser(add_help=False)
+    image_options.add_argument("--workers", type=int, default=None, help="image conversion processes (default: one per core)")
+    image_options.add_argument("--memory-limit", type=int, default=None, help="MB each image worker may use, big images are converted in strips to stay below it")
+    image_options.add_argument("--frames", choices=["auto", "animate", "split", "first"], default="auto",
+                               help="what happens to animated images: keep them animated, save every frame or only keep the first (default: animate when the new type can)")
+
+    video_options = argparse.ArgumentParser(add_help=False)
+    video_options.add_argument("--video-workers", type=int, default=1, help="videos converted at the same time")
+    video_options.add_argument("--parallel-video", action="store_true", help="split videos into segments that are encoded in parallel")
+    video_options.add_argument("--segment-seconds", type=int, default=60, help="segment length for --parallel-video")
+    video_options.add_argument("--no-remux", action="store_true", help="always re-encode videos instead of copying the streams")
+
+    incremental_options = argparse.ArgumentParser(add_help=False)
+    incremental_options.add_argument("--incremental", action="store_true", help="skip files whose output is still up to date from an earlier run")
+    incremental_options.add_argument("--manifest", dest="manifest_path", help="where --incremental keeps track of the outputs (default: in the cache folder)")
+
+    download_options = argparse.ArgumentParser(add_help=False)
+    download_options.add_argument("--download-workers", type=positive_int, default=4, help="downloads running at the same time")
+    download_options.add_argument("--per-host", type=positive_int, default=2, help="downloads running at the same time from one site")
+
+    commands = parser.add_subparsers(dest="command")
+
+    convert_parser = commands.add_parser("convert", help="convert images or videos", parents=[output_options, image_options, video_options, incremental_options])
+    convert_parser.add_argument("paths", nargs="+", help="files, folders or glob patterns")
+    convert_parser.add_argument("--to", required=True, help="the new file type, for example png or mp4")
+
+    download_parser = commands.add_parser("download", help="download videos or playlists", parents=[output_options, download_options])
+    download_parser.add_argument("links", nargs="+")
+    download_parser.add_argument("--dir", default=".", help="folder the videos are downloaded to")
+    download_parser.add_argument("--retry-failed", action="store_true", help="try failed downloads from an earlier run again")
+    download_parser.add_argument("--to", help="convert the videos to this type while they download, only the converted file is kept")
+
+    batch_parser = commands.add_parser("batch", help="run every job in a .json or .csv manifest",
+                                       parents=[output_options, image_options, video_options, incremental_options, download_options])
+    batch_parser.add_argument("manifest")
+
+    preview_parser = commands.add_parser("preview", help="save a poster frame or a contact sheet of videos next to them", parents=[output_options])
+    preview_parser.add_argument("paths", nargs="+", help="files, folders or glob patterns")
+    preview_parser.add_argument("--sheet", action="store_true", help="a grid of frames from the whole video instead of one frame")
+    preview_parser.add_argument("--frames", type=int, default=9, help="frames on a contact sheet")
+    preview_parser.add_argument("--columns", type=int, default=3, help="columns on a contact sheet")
+    preview_parser.add_argument("--width", type=int, default=320, help="width of a frame in pixels")
+    preview_parser.add_argument("--video-workers", type=int, default=1, help="videos previewed at the same time")
+
+    watch_parser = commands.add_parser("watch", help="convert files as soon as they are dropped into folders, until Ctrl+C",
+                                       parents=[output_options, image_options, video_options, incremental_options])
+    watch_parser.add_argument("folders", nargs="+")
+    watch_parser.add_argument("--image-to", help="the new type for images, for example png")
+    watch_parser.add_argument("--video-to", help="the new type for videos, for example mp4")
+    watch_parser.add_argument("--debounce", type=float, default=2.0, help="seconds without writes before a file that is still open counts as complete")
+    watch_parser.add_argument("--max-in-flight", type=int, default=None, help="conversions running or queued in the pools at once, the rest waits")
+    watch_parser.add_argument("--max-attempts", type=int, default=5, help="tries before a failing file is given up on")
+    watch_parser.add_argument("--state", help="where the queue and retries are kept (default: .nt_watch.json in the first folder)")
+    watch_parser.add_argument("--scan-existing", action="store_true", help="also convert the files that are already in the folders")
+
+    return parser
+
+def expand_paths(paths, kind): # Folders and glob patterns are expanded the same way as for batch image conversion, keeping files of kind
+
+    converter = FileConverter()
+    file_types = converter.supported_files[2 if kind == "video" else 1][1].split()
+
+    expanded = []
+    for path in paths:
+        expanded.extend(converter.find_images(path, file_types) if os.path.isdir(path) or glob.has_magic(path) else [path])
+
+    return expanded
+
+def preview_files(paths, sheet=False, frames=9, columns=3, width=320, workers=1):
+    # Saves a poster frame (name.ext.preview.jpg) or a contact sheet (name.ext.sheet.jpg) next to every video and returns one result dict per file
+
+    previewer = VideoPreviewer()
+
+    def preview_one(file_path):
+
+        start_time = time.perf_counter()
+        output = file_path + (".sheet.jpg" if sheet else ".preview.jpg") # The extension stays so a.mp4 and a.mkv dont share a preview
+        result = {'action': 'preview', 'source': file_path, 'output': None, 'status': 'done', 'error': None}
+
+        try:
+            img = previewer.contact_sheet(file_path, frames, columns, width) if sheet else previewer.poster(file_path, width)
+            img.save(output, format="JPEG", quality=85)
+            result['output'] = output
+        except Exception as e:
+            result['status'] = 'failed'
+            result['error'] = f"{type(e).__name__}: {e}"
+            metrics.failure("preview_job", e)
+
+        result['seconds'] = time.perf_counter() - start_time
+        return result
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        return list(executor.map(preview_one, paths))
+
+def run_command(args): # Runs a command line command and returns the result dicts
+
+    if args.command == "preview":
+        return preview_files(expand_paths(args.paths, "video"), args.sheet, args.frames, args.columns, args.width, args.video_workers)
+
+    if args.command == "download":
+        results, report = download_links(args.links, args.dir, args.download_workers, args.per_host, args.retry_failed, args.to)
+        return results
+
+    # Every command from here on converts files
+    memory_limit = args.memory_limit * 2**20 if args.memory_limit else None
+    manifest = ConversionManifest(args.manifest_path) if args.incremental or args.manifest_path else None
+
+    if args.command == "convert":
+        paths = expand_paths(args.paths, get_file_kind("file." + args.to.split(".")[-1])) # Folders only give the files that can become the new type
+
+        return convert_files(paths, args.to, args.workers, args.video_workers, not args.no_remux, args.parallel_video, args.segment_seconds, memory_limit, args.frames, manifest)
+
+    if args.command == "watch":
+        targets = {kind: new_type for kind, new_type in (("image", args.image_to), ("video", args.video_to)) if new_type}
+
+        if not targets:
+            raise SystemExit("watch needs --image-to and/or --video-to")
+
+        daemon = WatchDaemon(args.folders, targets, args.state, args.workers or os.cpu_count() or 1, args.video_workers, args.max_in_flight,
+                             args.debounce, args.max_attempts, manifest=manifest, allow_remux=not args.no_remux, parallel_video=args.parallel_video,
+                             segment_seconds=args.segment_seconds, memory_limit=memory_limit, frames=args.frames)
+
+        try:
+            daemon.run(args.scan_existing)
+        except KeyboardInterrupt:
+            print("Stopped watching")
+
+        # Only the files that were given up on are reported, everything else was printed as it happened
+        return [{'action': 'convert', 'source': file_path, 'output': None, 'status': 'failed', 'error': daemon.failed[file_path]}
+                for file_path in daemon.session_failures]
+
+    return run_manifest(args.manifest, args.workers, args.video_workers, args.download_workers, args.per_host, not args.no_remux, args.parallel_video, memory_limit, args.frames, manifest)
+
+def main(argv=None):
+
+    args = build_parser().parse_args(argv)
+
+    if args.command is None: # No command means the normal app
+
+        if tk is None:
+            print("Tk is not available here, use one of the commands instead (see --help)")
+            return 1
+
+        App(measure_startup=args.startup_time)
+        return 0
+
+    metrics.events_path = args.metrics_jsonl
+    metrics.profile_dir = args.profile_dir
+
+    if args.json:
+        with contextlib.redirect_stdout(sys.stderr): # Keeps stdout clean for the json
+            results = run_command(args)
 
-            thumbnail = thumbnail.resize((320, 180), Image.LANCZOS)
-            thumbnail_img = ImageTk.PhotoImage(thumbnail)
+        print(json.dumps({'results': results, 'failed': sum(1 for result in results if result['status'] == 'failed')}, indent=2))
+    else:
+        results = run_command(args)
 
-            self.video_label.config(image=thumbnail_img) # Assigning the thumbnail image to the placeholder
-            self.video_label.img = thumbnail_img
+        for result in results:
+            print(f"{result['status']}: {result['source']} -> {result['output'] or result['error']}")
 
-            self.title.config(text=video_title) 
-            self.confirm_button.config(text="Download", bg="#0310a1", command=lambda: self.download(self.yt_dl, yt_link))
-            self.cancel_button.config(text="Cancel", command=lambda: self.load_ui(self.root, self.app))
+    if args.metrics:
+        metrics.write_prometheus(args.metrics)
 
-def main():
-    myApp = App()
+    return 1 if any(result['status'] == 'failed' for result in results) else 0
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
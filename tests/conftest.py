@@ -0,0 +1,82 @@
+import os
+import sys
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # main.py lives in the repo root
+
+class LocalServer: # Serves files from memory and remembers what was asked for, so tests dont need the internet
+
+    def __init__(self):
+        self.files = {} # path -> (data, content type)
+        self.delay = 0.0 # Seconds every GET takes, to keep downloads running side by side
+        self.requests = [] # (method, path, host) in the order they came in
+        self.active = {} # host -> requests running right now
+        self.max_active = {} # host -> most requests that ran at once
+        self.max_total = 0 # Most requests that ran at once over all hosts
+        self.lock = threading.Lock()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_HEAD(self):
+                self.respond(send_body=False)
+
+            def do_GET(self):
+                self.respond(send_body=True)
+
+            def respond(self, send_body):
+                host = self.headers.get("Host", "").split(":")[0]
+
+                with server.lock:
+                    server.requests.append((self.command, self.path, host))
+                    server.active[host] = server.active.get(host, 0) + 1
+                    server.max_active[host] = max(server.max_active.get(host, 0), server.active[host])
+                    server.max_total = max(server.max_total, sum(server.active.values()))
+
+                try:
+                    if send_body and server.delay:
+                        time.sleep(server.delay)
+
+                    if self.path not in server.files:
+                        self.send_error(404)
+                        return
+
+                    data, content_type = server.files[self.path]
+                    self.send_response(200)
+                    self.send_header("Content-Type", content_type)
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+
+                    if send_body:
+                        self.wfile.write(data)
+                finally:
+                    with server.lock:
+                        server.active[host] -= 1
+
+            def log_message(self, *args): # Keeps the test output clean
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.port = self.httpd.server_address[1]
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def url(self, path, host="127.0.0.1"):
+        return f"http://{host}:{self.port}{path}"
+
+    def gets(self, path): # How often a file was downloaded
+        return sum(1 for method, requested, host in self.requests if method == "GET" and requested == path)
+
+@pytest.fixture
+def http_server():
+    server = LocalServer()
+    server.thread.start()
+
+    yield server
+
+    server.httpd.shutdown()
+    server.httpd.server_close()
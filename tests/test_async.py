@@ -0,0 +1,145 @@
+import asyncio
+import threading
+import time
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+import main
+
+class StubDownloader: # Stands in for YoutubeDownloader, lookups wait until the test lets them finish
+
+    def __init__(self, thumbnails):
+        self.thumbnails = thumbnails
+        self.release = threading.Event()
+        self.lookups = []
+        self.stopped = threading.Event()
+
+    def get_info(self, link):
+        self.lookups.append(link)
+        self.release.wait(10)
+
+        if "broken" in link:
+            raise ValueError("no such video")
+
+        return {'title': "Title of " + link, 'thumbnail': link + "/thumbnail.jpg"}
+
+    def fetch_vid(self, link, download_dir, filename=None, hooks=()):
+        try:
+            for downloaded in range(1000): # Reports progress like yt_dlp until a hook stops it
+                for hook in hooks:
+                    hook({'status': "downloading", 'downloaded_bytes': downloaded, 'total_bytes': 1000})
+                time.sleep(0.01)
+        except main.JobCancelled:
+            self.stopped.set()
+            raise
+
+    def load_thumbnail(self, thumbnail_path, size=None):
+        return main.YoutubeDownloader.load_thumbnail(self, thumbnail_path, size)
+
+class ThreadCheckingCache(main.ThumbnailCache): # Remembers which threads used the cache, none of them may be the loop's
+
+    def __init__(self, directory):
+        super().__init__(directory)
+        self.threads = []
+
+    def get(self, url):
+        self.threads.append(threading.current_thread())
+        return super().get(url)
+
+    def put(self, url, data):
+        self.threads.append(threading.current_thread())
+        return super().put(url, data)
+
+def make_downloader(tmp_path):
+    return StubDownloader(ThreadCheckingCache(str(tmp_path / "thumbnails")))
+
+def test_same_link_is_looked_up_once(tmp_path):
+    stub = make_downloader(tmp_path)
+
+    async def lookups():
+        async with main.AsyncYoutubeDownloader(stub) as downloader:
+            links = ["https://www.youtube.com/watch?v=abc", "youtube.com/watch?v=abc", "https://youtu.be/abc", "https://youtu.be/other"]
+            waiting = asyncio.gather(*(downloader.get_info(link) for link in links))
+
+            await asyncio.sleep(0.1)
+            stub.release.set()
+            results = await waiting
+
+            assert results[0] == results[1] == results[2] != results[3]
+            assert len(stub.lookups) == 2
+            assert downloader.lookups == {} # Finished lookups are forgotten, the InfoCache keeps the results
+
+            await downloader.get_info("https://youtu.be/abc") # A later call asks the downloader again
+            assert len(stub.lookups) == 3
+
+    asyncio.run(lookups())
+
+def test_timeout_only_stops_the_caller_that_gave_up(tmp_path):
+    stub = make_downloader(tmp_path)
+
+    async def lookups():
+        async with main.AsyncYoutubeDownloader(stub, timeout=0.1) as downloader:
+            patient = asyncio.ensure_future(downloader.get_info("https://youtu.be/abc", timeout=10))
+
+            start_time = time.monotonic()
+            with pytest.raises(asyncio.TimeoutError):
+                await downloader.get_info("https://youtu.be/abc") # The default timeout
+
+            assert time.monotonic() - start_time < 1
+            assert not patient.done()
+
+            stub.release.set()
+            assert (await patient)['title'] == "Title of https://youtu.be/abc"
+            assert len(stub.lookups) == 1
+
+    asyncio.run(lookups())
+
+def test_get_vids_returns_errors_in_order(tmp_path):
+    stub = make_downloader(tmp_path)
+    stub.release.set()
+
+    async def lookups():
+        async with main.AsyncYoutubeDownloader(stub) as downloader:
+            return await downloader.get_vids(["https://youtu.be/a", "https://youtu.be/broken", "https://youtu.be/c"])
+
+    first, broken, last = asyncio.run(lookups())
+
+    assert first == ("Title of https://youtu.be/a", "https://youtu.be/a/thumbnail.jpg")
+    assert isinstance(broken, ValueError)
+    assert last[0] == "Title of https://youtu.be/c"
+
+def test_thumbnails_are_cached_off_the_loop(tmp_path, http_server):
+    image = BytesIO()
+    Image.new("RGB", (64, 48), "red").save(image, format="JPEG")
+    http_server.files["/thumbnail.jpg"] = (image.getvalue(), "image/jpeg")
+
+    stub = make_downloader(tmp_path)
+
+    async def thumbnails():
+        async with main.AsyncYoutubeDownloader(stub) as downloader:
+            loop_thread = threading.current_thread()
+            images = [await downloader.download_thumbnail(http_server.url("/thumbnail.jpg"), (32, 24)) for _ in range(2)]
+            return images, loop_thread
+
+    images, loop_thread = asyncio.run(thumbnails())
+
+    assert [img.size for img in images] == [(32, 24), (32, 24)]
+    assert http_server.gets("/thumbnail.jpg") == 1 # The second one came from the cache
+    assert len(stub.thumbnails.threads) == 3 # get, put, get
+    assert loop_thread not in stub.thumbnails.threads
+
+def test_download_timeout_stops_the_download(tmp_path):
+    stub = make_downloader(tmp_path)
+    updates = []
+
+    async def download():
+        async with main.AsyncYoutubeDownloader(stub) as downloader:
+            with pytest.raises(asyncio.TimeoutError):
+                await downloader.download_vid("https://youtu.be/abc", str(tmp_path), progress=updates.append, timeout=0.3)
+
+    asyncio.run(download())
+
+    assert stub.stopped.wait(5) # The thread stopped at its next progress report instead of running to the end
+    assert updates and all(0 <= fraction < 1 for fraction in updates)
@@ -0,0 +1,96 @@
+import mmap
+import subprocess
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+import main
+
+def as_source(data, kind, tmp_path): # The same bytes as each kind of buffer save_image_data and save_video_data take
+    if kind == "bytes":
+        return bytes(data)
+    if kind == "bytearray":
+        return bytearray(data)
+    if kind == "memoryview":
+        return memoryview(bytearray(data))
+
+    path = tmp_path / "source.bin"
+    path.write_bytes(data)
+    with open(path, "rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+def convert_to(function, kind): # Runs function(output) for each kind of output and returns the converted bytes
+    if kind == "return":
+        return function(None)
+
+    if kind == "stream":
+        output = BytesIO()
+        assert function(output) == len(output.getvalue())
+        return output.getvalue()
+
+    if kind == "bytearray":
+        output = bytearray(b"header") # Appended to, what was there stays
+        written = function(output)
+        assert output[:6] == b"header"
+        return bytes(output[6:6 + written])
+
+    output = mmap.mmap(-1, 2**22) if kind == "mmap" else memoryview(bytearray(2**22)) # Fixed size, filled from the start
+    written = function(output)
+    return bytes(output[:written])
+
+@pytest.fixture(scope="module")
+def png_data():
+    buffer = BytesIO()
+    Image.new("RGBA", (40, 30), (255, 0, 0, 128)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+@pytest.mark.parametrize("output_kind", ["return", "stream", "bytearray", "memoryview", "mmap"])
+@pytest.mark.parametrize("source_kind", ["bytes", "bytearray", "memoryview", "mmap"])
+def test_image_data(tmp_path, png_data, source_kind, output_kind):
+    source = as_source(png_data, source_kind, tmp_path)
+
+    data = convert_to(lambda output: main.save_image_data(source, "jpg", output, main.Metrics()), output_kind)
+
+    with Image.open(BytesIO(data)) as img:
+        assert img.format == "JPEG" and img.size == (40, 30) and img.mode == "RGB"
+
+def test_image_data_too_small_output(png_data):
+    with pytest.raises(ValueError):
+        main.save_image_data(png_data, "bmp", memoryview(bytearray(100)), main.Metrics())
+
+@pytest.fixture(scope="module")
+def mp4_data(tmp_path_factory): # Index at the end, like most cameras and editors write them
+    path = tmp_path_factory.mktemp("video") / "clip.mp4"
+    subprocess.run([main.get_ffmpeg(), "-y", "-v", "error", "-f", "lavfi", "-i", "testsrc2=duration=1:size=160x120:rate=10",
+                    "-f", "lavfi", "-i", "sine=duration=1", "-c:v", "libx264", "-c:a", "aac", str(path)], check=True)
+    return path.read_bytes(), main.probe_video(str(path))['duration']
+
+def probe(data, tmp_path, new_type):
+    path = tmp_path / ("output." + new_type)
+    path.write_bytes(data)
+    return main.probe_video(str(path))
+
+@pytest.mark.parametrize("source_kind", ["bytes", "bytearray", "memoryview", "mmap"])
+@pytest.mark.parametrize("new_type", ["mkv", "avi"]) # mkv goes out through the pipe, avi through a temporary file
+def test_video_data_sources(tmp_path, mp4_data, source_kind, new_type):
+    mp4_data, duration = mp4_data
+    source = as_source(mp4_data, source_kind, tmp_path)
+
+    data, method = main.FileConverter().save_video_data(source, new_type)
+
+    assert method == "remux"
+    streams = probe(data, tmp_path, new_type)
+    assert streams['video'] == ['h264'] and streams['audio'] == ['aac']
+
+    if new_type != "mkv": # mkvs written to a pipe cant go back to fill in their duration
+        assert streams['duration'] == pytest.approx(duration, abs=0.25) # avi rounds up to whole frames, which shows on a short clip
+
+@pytest.mark.parametrize("output_kind", ["stream", "bytearray", "memoryview", "mmap"])
+def test_video_data_outputs(tmp_path, mp4_data, output_kind):
+    mp4_data, duration = mp4_data
+    data = convert_to(lambda output: main.FileConverter().save_video_data(mp4_data, "mp4", output, allow_remux=False)[0], output_kind)
+
+    streams = probe(data, tmp_path, "mp4")
+    assert streams['video'] == ['h264'] and streams['audio'] == ['aac']
+    assert streams['duration'] == pytest.approx(duration, abs=0.25) # The new aac encode adds its priming samples
@@ -0,0 +1,60 @@
+import os
+import subprocess
+
+import pytest
+
+import benchmark
+import main
+
+@pytest.fixture
+def stub_site(tmp_path): # benchmark.py's stand-in for the video site, it serves whole files only (no Range requests)
+    site_dir = tmp_path / "site"
+    site_dir.mkdir()
+
+    # The page points at video.mp4, the tests decide if it has its index (moov) at the start or at the end
+    benchmark.make_video(str(site_dir / "index_at_end.mp4"), 3)
+    subprocess.run([main.get_ffmpeg(), "-y", "-v", "error", "-i", str(site_dir / "index_at_end.mp4"), "-c", "copy",
+                    "-movflags", "+faststart", str(site_dir / "index_at_start.mp4")], check=True)
+
+    server, url = benchmark.start_stub_server(str(site_dir))
+
+    with open(site_dir / "page.html", "w") as f:
+        f.write(benchmark.stub_page(url))
+
+    yield site_dir, url
+
+    server.shutdown()
+    server.server_close()
+
+def use_video(site_dir, name):
+    os.replace(site_dir / name, site_dir / "video.mp4")
+
+def download(url, download_dir, new_type):
+    downloader = main.YoutubeDownloader(cache=main.InfoCache(), thumbnails=main.ThumbnailCache(str(download_dir / "thumbnails")))
+    return downloader.download_converted(url + "/page.html", str(download_dir), new_type)
+
+@pytest.mark.parametrize("new_type", ["mkv", "mov"])
+def test_streams_straight_into_the_new_type(stub_site, tmp_path, new_type):
+    site_dir, url = stub_site
+    use_video(site_dir, "index_at_start.mp4")
+
+    output_file, method = download(url, tmp_path, new_type)
+
+    assert method == "stream remux"
+    streams = main.probe_video(output_file)
+    assert streams['video'] == ['h264'] and streams['audio'] == ['aac']
+    assert streams['duration'] == pytest.approx(3, abs=0.2)
+    assert not [name for name in os.listdir(tmp_path) if name.startswith(".nt_download_") or name.endswith(".part")]
+
+@pytest.mark.parametrize("new_type", ["mkv", "mov"])
+def test_broken_stream_falls_back_to_downloading_first(stub_site, tmp_path, new_type):
+    site_dir, url = stub_site
+    use_video(site_dir, "index_at_end.mp4") # ffmpeg cant seek to the index without Range requests, so streaming cant work
+
+    output_file, method = download(url, tmp_path, new_type)
+
+    assert method.startswith("download + ")
+    streams = main.probe_video(output_file)
+    assert streams['video'] == ['h264'] and streams['audio'] == ['aac']
+    assert streams['duration'] == pytest.approx(3, abs=0.2)
+    assert not [name for name in os.listdir(tmp_path) if name.startswith(".nt_download_") or name.endswith(".part")]
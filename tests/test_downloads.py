@@ -0,0 +1,77 @@
+import os
+import urllib.request
+
+import pytest
+
+import main
+
+class StubDownloader: # Stands in for yt_dlp, every link is one video fetched with a plain GET
+
+    def expand_link(self, link):
+        return [link]
+
+    def fetch_vid(self, link, download_dir, filename=None, hooks=()):
+        file_path = os.path.join(download_dir, link.rsplit("/", 1)[-1])
+
+        with urllib.request.urlopen(link, timeout=10) as response, open(file_path, "wb") as f:
+            f.write(response.read())
+
+        return file_path
+
+def make_downloader(tmp_path): # A real downloader with its own caches, so tests dont share state with each other or the app
+    return main.YoutubeDownloader(cache=main.InfoCache(), thumbnails=main.ThumbnailCache(str(tmp_path / "thumbnails")))
+
+def test_queue_resumes_after_a_stop(http_server, tmp_path):
+    videos = {f"/{name}.mp4": os.urandom(40000) for name in ("a", "b")}
+    for path, data in videos.items():
+        http_server.files[path] = (data, "video/mp4")
+
+    links = [http_server.url(path) for path in videos]
+    download_dir = str(tmp_path / "videos")
+    os.makedirs(download_dir)
+
+    first = main.DownloadManager(download_dir, downloader=make_downloader(tmp_path))
+    first.add(links)
+    first.items[0]['status'] = 'downloading' # Stopped in the middle of the first download
+    first.save_state()
+
+    second = main.DownloadManager(download_dir, downloader=make_downloader(tmp_path))
+    assert [item['status'] for item in second.items] == ['pending', 'pending']
+
+    report = second.run()
+    assert report['done'] == 2
+
+    for item in second.items:
+        with open(item['filepath'], "rb") as f:
+            assert f.read() == videos["/" + os.path.basename(item['url'])]
+
+    # A third run finds everything done and downloads nothing again
+    updates = []
+    third = main.DownloadManager(download_dir, downloader=make_downloader(tmp_path))
+    assert [item['status'] for item in third.add(links)] == ['done', 'done']
+    assert third.run(on_update=updates.append)['bytes'] == 0
+    assert updates == []
+
+@pytest.mark.parametrize("max_per_host", [1, 2])
+def test_per_host_limit(http_server, tmp_path, max_per_host):
+    http_server.delay = 0.3
+    links = []
+
+    for index in range(6):
+        http_server.files[f"/{index}.mp4"] = (b"video %d" % index, "video/mp4")
+        links.append(http_server.url(f"/{index}.mp4", host="127.0.0.1" if index % 2 else "localhost")) # Two hosts, same server
+
+    manager = main.DownloadManager(str(tmp_path), max_workers=4, max_per_host=max_per_host, downloader=StubDownloader())
+    manager.add(links)
+    report = manager.run()
+
+    assert report['done'] == 6
+    assert max(http_server.max_active.values()) == max_per_host
+    assert http_server.max_total == 2 * max_per_host # Both hosts were downloaded from at the same time
+
+def test_limits_have_to_allow_a_download(tmp_path):
+    with pytest.raises(ValueError):
+        main.DownloadManager(str(tmp_path), max_per_host=0)
+
+    with pytest.raises(ValueError):
+        main.DownloadManager(str(tmp_path), max_workers=0)
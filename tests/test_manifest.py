@@ -0,0 +1,84 @@
+import os
+
+from PIL import Image
+
+import main
+
+def make_images(folder, count=3):
+    paths = []
+
+    for index in range(count):
+        path = str(folder / f"image_{index}.png")
+        Image.new("RGB", (40, 30), (index * 80, 0, 0)).save(path)
+        paths.append(path)
+
+    return paths
+
+def convert(paths, manifest_path): # One incremental run, returns {source: 'converted' or 'skipped'}
+    converter = main.FileConverter(main.ConversionManifest(manifest_path))
+    results, report = converter.convert_images(paths, "bmp", workers=1)
+
+    assert report['failed'] == 0
+    return {result['source']: 'skipped' if result.get('skipped') else 'converted' for result in results}
+
+def test_unchanged_sources_are_skipped(tmp_path):
+    paths = make_images(tmp_path)
+    manifest_path = str(tmp_path / "manifest.json")
+
+    assert set(convert(paths, manifest_path).values()) == {'converted'}
+    assert set(convert(paths, manifest_path).values()) == {'skipped'}
+
+def test_touched_but_unchanged_source_is_skipped(tmp_path):
+    paths = make_images(tmp_path)
+    manifest_path = str(tmp_path / "manifest.json")
+    convert(paths, manifest_path)
+
+    os.utime(paths[0], (1, 1)) # Same content, only the mtime changed, so the hash says it is still up to date
+    assert convert(paths, manifest_path)[paths[0]] == 'skipped'
+
+def test_edited_source_is_converted_again(tmp_path):
+    paths = make_images(tmp_path)
+    manifest_path = str(tmp_path / "manifest.json")
+    convert(paths, manifest_path)
+
+    Image.new("RGB", (40, 30), "blue").save(paths[1])
+    os.utime(paths[1], (1, 1)) # Even an mtime going backwards counts, only a matching hash is trusted
+
+    assert convert(paths, manifest_path) == {paths[0]: 'skipped', paths[1]: 'converted', paths[2]: 'skipped'}
+
+    with Image.open(str(tmp_path / "image_1.bmp")) as img:
+        assert img.getpixel((0, 0)) == (0, 0, 255)
+
+def test_deleted_or_edited_output_is_converted_again(tmp_path):
+    paths = make_images(tmp_path)
+    manifest_path = str(tmp_path / "manifest.json")
+    convert(paths, manifest_path)
+
+    os.remove(str(tmp_path / "image_0.bmp"))
+    with open(str(tmp_path / "image_2.bmp"), "ab") as f:
+        f.write(b"changed by hand")
+
+    assert convert(paths, manifest_path) == {paths[0]: 'converted', paths[1]: 'skipped', paths[2]: 'converted'}
+    assert os.path.exists(str(tmp_path / "image_0.bmp"))
+
+def test_other_settings_are_converted_again(tmp_path):
+    paths = make_images(tmp_path, count=1)
+    manifest = main.ConversionManifest(str(tmp_path / "manifest.json"))
+    main.FileConverter(manifest).convert_images(paths, "bmp", workers=1)
+
+    assert manifest.up_to_date(paths[0], "BMP", {'frames': "auto"}) is not None
+    assert manifest.up_to_date(paths[0], "BMP", {'frames': "first"}) is None
+    assert manifest.up_to_date(paths[0], "GIF", {'frames': "auto"}) is None
+
+def test_videos_are_skipped_until_they_change(tmp_path):
+    source = str(tmp_path / "clip.mp4")
+    main.subprocess.run([main.get_ffmpeg(), "-y", "-v", "error", "-f", "lavfi", "-i", "testsrc2=duration=1:size=160x120:rate=10",
+                         "-c:v", "libx264", source], check=True)
+
+    converter = main.FileConverter(main.ConversionManifest(str(tmp_path / "manifest.json")))
+
+    assert converter.save_video_as(source, "mkv")[1] == "remux"
+    assert converter.save_video_as(source, "mkv")[1] == "skipped, up to date"
+
+    os.remove(str(tmp_path / "clip.mkv"))
+    assert converter.save_video_as(source, "mkv")[1] == "remux"
@@ -0,0 +1,60 @@
+import os
+
+import pytest
+from PIL import Image, ImageDraw
+
+import main
+
+def make_image(mode, size=(64, 48)): # A gradient with a block in it, so rows and columns that end up in the wrong place show
+    img = Image.linear_gradient("L").resize(size).convert("RGB")
+    ImageDraw.Draw(img).rectangle((10, 10, 40, 30), fill=(200, 30, 90))
+
+    if mode == "RGBA":
+        img = img.convert("RGBA")
+        img.putalpha(Image.linear_gradient("L").resize(size).rotate(90))
+    elif mode == "P":
+        img = img.quantize(16)
+    else:
+        img = img.convert(mode)
+
+    return img
+
+def strip_limit(file_path): # A limit that sends the image down the strip path but still leaves room for the plan
+    with Image.open(file_path) as img:
+        needed = main.estimate_image_bytes(img.size, img.mode)
+        return 4096 if main.is_raw_image(img) else needed * 2 - 1
+
+def pixels(file_path):
+    with Image.open(file_path) as img:
+        return img.convert("RGBA").tobytes()
+
+# bmps are read from the file a few rows at a time, pngs are decoded whole first and then cut into strips
+@pytest.mark.parametrize("source_type, new_type", [("bmp", "png"), ("png", "bmp")])
+@pytest.mark.parametrize("mode", ["P", "RGB", "RGBA", "L", "1"])
+def test_strips_match_the_normal_conversion(tmp_path, mode, source_type, new_type):
+    source = str(tmp_path / "strips" / f"image.{source_type}")
+    normal_source = str(tmp_path / "normal" / f"image.{source_type}")
+    os.makedirs(os.path.dirname(source))
+    os.makedirs(os.path.dirname(normal_source))
+
+    make_image(mode).save(source)
+    make_image(mode).save(normal_source)
+
+    strip_metrics = main.Metrics()
+    output = main.save_image_as(source, new_type, strip_metrics, memory_limit=strip_limit(source))
+    normal_output = main.save_image_as(normal_source, new_type, main.Metrics())
+
+    assert "image_strip_convert" in strip_metrics.stages
+    assert pixels(output) == pixels(normal_output)
+
+    if new_type == "png": # bmps as PIL reads them have no alpha, everything else has to come through unchanged
+        assert pixels(output) == pixels(source)
+
+def test_too_small_limit_raises_memory_error(tmp_path):
+    source = str(tmp_path / "image.png")
+    make_image("RGB").save(source)
+
+    with pytest.raises(MemoryError):
+        main.save_image_as(source, "bmp", main.Metrics(), memory_limit=1000) # Not even the decoded png fits
+
+    assert not os.path.exists(tmp_path / "image.bmp")
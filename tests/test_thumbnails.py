@@ -0,0 +1,37 @@
+import os
+from io import BytesIO
+
+from PIL import Image
+
+import main
+
+def test_thumbnail_is_only_fetched_once(http_server, tmp_path):
+    thumbnail = BytesIO()
+    Image.new("RGB", (64, 36), "red").save(thumbnail, format="PNG")
+    http_server.files["/thumb.png"] = (thumbnail.getvalue(), "image/png")
+
+    downloader = main.YoutubeDownloader(cache=main.InfoCache(), thumbnails=main.ThumbnailCache(str(tmp_path)))
+
+    for _ in range(3):
+        assert downloader.download_thumbnail(http_server.url("/thumb.png"), (32, 18)).size == (32, 18)
+
+    assert http_server.gets("/thumb.png") == 1
+
+def test_thumbnail_cache_evicts_least_recently_used(tmp_path):
+    cache = main.ThumbnailCache(str(tmp_path), max_bytes=250)
+
+    a_path = cache.put("http://example.com/a.jpg", os.urandom(100))
+    os.utime(a_path, (1, 1))
+    b_path = cache.put("http://example.com/b.jpg", os.urandom(100))
+    os.utime(b_path, (2, 2))
+
+    assert cache.get("http://example.com/a.jpg") == a_path # Used again, so b is now the oldest
+    cache.put("http://example.com/c.jpg", os.urandom(100))
+
+    assert not os.path.exists(b_path)
+    assert cache.get("http://example.com/b.jpg") is None
+    assert cache.get("http://example.com/a.jpg") == a_path
+
+    reopened = main.ThumbnailCache(str(tmp_path), max_bytes=250) # The index on disk forgot b as well
+    assert reopened.get("http://example.com/b.jpg") is None
+    assert reopened.get("http://example.com/c.jpg") is not None
@@ -0,0 +1,93 @@
+import json
+import os
+import threading
+import time
+
+from PIL import Image
+
+import main
+
+def wait_for(condition, timeout=60): # The daemon works on its own thread, this polls until it got somewhere
+    deadline = time.monotonic() + timeout
+
+    while not condition():
+        assert time.monotonic() < deadline, "the daemon took too long"
+        time.sleep(0.05)
+
+def start(daemon, watcher):
+    thread = threading.Thread(target=daemon.run, kwargs={'scan_existing': True, 'watcher': watcher})
+    thread.start()
+    return thread
+
+def test_scan_cycle(tmp_path):
+    folder = tmp_path / "inbox"
+    (folder / "nested" / "deeper").mkdir(parents=True)
+    (folder / ".hidden").mkdir()
+
+    Image.new("RGB", (32, 24), "red").save(str(folder / "top.jpg"))
+    Image.new("RGB", (32, 24), "green").save(str(folder / "nested" / "deeper" / "inner.bmp"))
+    Image.new("RGB", (32, 24), "blue").save(str(folder / ".hidden" / "skipped.bmp"))
+    Image.new("RGB", (32, 24), "blue").save(str(folder / "already.png"))
+    with open(folder / "broken.jpg", "wb") as f:
+        f.write(b"not an image")
+
+    state_path = str(tmp_path / "watch.json")
+    manifest_path = str(tmp_path / "manifest.json")
+    daemon = main.WatchDaemon([str(folder)], {'image': "png"}, state_path=state_path, workers=2, debounce=0.2, max_attempts=1,
+                              manifest=main.ConversionManifest(manifest_path))
+    thread = start(daemon, main.PollingWatcher(daemon.folders, interval=0.1))
+
+    try:
+        wait_for(lambda: os.path.exists(folder / "top.png") and os.path.exists(folder / "nested" / "deeper" / "inner.png")
+                 and str(folder / "broken.jpg") in daemon.failed)
+
+        # Files dropped in while it runs are picked up by the watcher, not only by the first scan
+        Image.new("RGB", (32, 24), "white").save(str(folder / "nested" / "late.bmp"))
+        wait_for(lambda: os.path.exists(folder / "nested" / "late.png"))
+    finally:
+        daemon.stop()
+        thread.join(timeout=60)
+
+    assert not thread.is_alive()
+
+    with Image.open(str(folder / "nested" / "deeper" / "inner.png")) as img:
+        assert img.getpixel((0, 0)) == (0, 128, 0)
+
+    assert not os.path.exists(folder / ".hidden" / "skipped.png")
+    assert not os.path.exists(folder / "already.png.png")
+
+    with open(state_path) as f:
+        state = json.load(f)
+
+    assert state['queue'] == [] and state['retries'] == {}
+    assert list(state['failed']) == [str(folder / "broken.jpg")]
+
+    with open(manifest_path) as f:
+        assert len(json.load(f)['entries']) == 3
+
+def test_restart_skips_finished_files_and_keeps_failures(tmp_path):
+    folder = tmp_path / "inbox"
+    folder.mkdir()
+    Image.new("RGB", (32, 24), "red").save(str(folder / "photo.bmp"))
+    with open(folder / "broken.jpg", "wb") as f:
+        f.write(b"not an image")
+
+    state_path = str(tmp_path / "watch.json")
+    manifest_path = str(tmp_path / "manifest.json")
+
+    for run in range(2):
+        daemon = main.WatchDaemon([str(folder)], {'image': "png"}, state_path=state_path, debounce=0.2, max_attempts=1,
+                                  manifest=main.ConversionManifest(manifest_path))
+        thread = start(daemon, main.PollingWatcher(daemon.folders, interval=0.1))
+
+        try:
+            # The broken file is tried again on every start, once it failed the photo was dealt with too
+            wait_for(lambda: str(folder / "broken.jpg") in daemon.session_failures and not daemon.queue and not daemon.in_flight)
+        finally:
+            daemon.stop()
+            thread.join(timeout=60)
+
+        if run == 0:
+            converted_at = os.stat(folder / "photo.png").st_mtime_ns
+
+    assert os.stat(folder / "photo.png").st_mtime_ns == converted_at # The manifest said it was up to date, so it was not written again